@@ -7,22 +7,51 @@ import pyqtgraph.opengl as gl
 from dataclasses import dataclass
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-    QPushButton, QComboBox, QFileDialog, QTableWidget, QTableWidgetItem,
+    QPushButton, QComboBox, QFileDialog, QTableView, QAbstractItemView,
     QSplitter, QLabel, QMessageBox, QHeaderView, QLineEdit,
     QMenuBar, QMenu, QDockWidget, QTextEdit, QToolBar, QProgressDialog,
-    QDialog, QScrollArea, QSizePolicy, QGridLayout, QStatusBar
+    QDialog, QScrollArea, QSizePolicy, QGridLayout, QStatusBar, QGraphicsItem,
+    QInputDialog
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QAbstractTableModel, QModelIndex
 from PyQt6 import QtGui
-from PyQt6.QtGui import QIcon, QColor, QBrush, QFont, QPalette, QKeySequence, QAction, QPixmap
+from PyQt6.QtGui import QIcon, QColor, QBrush, QFont, QPalette, QKeySequence, QAction, QPixmap, QOpenGLContext
 from PyQt6.QtCore import QThread, pyqtSignal
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     import psutil
 except ImportError:
     psutil = None
 
+try:
+    import pyarrow
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pyarrow = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _njit(func=None, **options):
+    """Compila la función con numba si está disponible; si no, la devuelve sin cambios
+
+    Por defecto usa cache=True y fastmath=True; las opciones dadas los sustituyen.
+    """
+    if func is None:
+        return lambda f: _njit(f, **options)
+    if numba is None:
+        return func
+    return numba.njit(**{'cache': True, 'fastmath': True, **options})(func)
+
+
+# Bucle paralelo dentro de funciones _njit; sin numba es un range normal
+_prange = numba.prange if numba is not None else range
+
 
 # --- Dataclass para colores de ejes y otros colores globales ---
 @dataclass
@@ -62,93 +91,322 @@ VIBRANT_COLORS = [
 ]
 NOISE_COLOR = '#888888'
 MAX_CSV_ROWS_TO_LOAD = 50000  # Maximum number of rows to load from a CSV file
+ADDITIVE_BLEND_MAX_POINTS = 20000  # Por encima, los puntos 3D se dibujan opacos
+
+# Paleta pre-convertida a RGBA float32 para OpenGL (una fila por color de VIBRANT_COLORS)
+VIBRANT_COLORS_RGBA = np.array([QColor(c).getRgbF() for c in VIBRANT_COLORS], dtype=np.float32)
+NOISE_COLOR_RGBA = np.array(QColor(NOISE_COLOR).getRgbF(), dtype=np.float32)
+_VIBRANT_COLOR_INDEX = {c: i for i, c in enumerate(VIBRANT_COLORS)}
 
 # Configurar PyQtGraph
-pg.setConfigOptions(antialias=True)
+# Sin antialiasing: el coste de pintar miles de puntos con QPainter se dispara con él activo.
+# Con numba instalado, pyqtgraph lo usa para reescalar datos y aplicar tablas de color.
+# OpenGL no se activa aquí de forma global: el gráfico 2D lo usa solo si se puede crear un contexto
+pg.setConfigOptions(antialias=False, useNumba=numba is not None)
 pg.setConfigOption('background', '#2b2b2b')
 pg.setConfigOption('foreground', 'w')
 
+def count_file_lines(file_path, block_size=1 << 20):
+    """Cuenta las líneas de un archivo buscando b'\\n' en bloques binarios, sin decodificar texto"""
+    total = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for buf in iter(lambda: f.read(block_size), b''):
+            total += buf.count(b'\n')
+            last = buf[-1:]
+    # Una última línea sin salto final también cuenta, igual que al iterar el archivo en modo texto
+    return total + (last != b'\n')
+
 class CSVLoaderThread(QThread):
     progress_updated = pyqtSignal(int, str)
     loading_finished = pyqtSignal(pd.DataFrame)
+    rows_counted = pyqtSignal(int)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, count_only=False):
         super().__init__()
         self.file_path = file_path
+        self.count_only = count_only
+        self._sample_rows = None
         self._is_cancelled = False
 
     def cancel(self):
         self._is_cancelled = True
 
-    def run(self):
+    def is_cancelled(self):
+        return self._is_cancelled
+
+    def load_sample(self, n_rows):
+        """Configura el hilo para leer solo las primeras n_rows filas"""
+        self.count_only = False
+        self._sample_rows = n_rows
+
+    def load_all(self):
+        """Configura el hilo para leer el archivo completo (hasta MAX_CSV_ROWS_TO_LOAD filas)"""
+        self.count_only = False
+        self._sample_rows = None
+
+    def _run_count(self):
+        """Cuenta las filas del archivo fuera del hilo de la interfaz"""
         try:
-            # Fase 1: Lectura del archivo
-            chunks = []
-            total_rows = 0
-            processed_rows = 0
-            # Contar filas totales
-            with open(self.file_path, "r", encoding="utf-8", errors="ignore") as f:
-                total_rows = sum(1 for _ in f)
-            if total_rows == 0:
-                raise Exception("El archivo está vacío.")
-            chunk_size = MAX_CSV_ROWS_TO_LOAD
-            for idx, chunk in enumerate(pd.read_csv(
+            total_rows = count_file_lines(self.file_path)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        if not self._is_cancelled:
+            self.rows_counted.emit(total_rows)
+
+    def _open_pyarrow_csv(self, **read_options):
+        """Abre el lector en streaming de pyarrow dejando como texto lo que no sea numérico
+
+        pyarrow reconoce fechas y booleanos que el motor C deja como texto; esas
+        columnas se releen como string para que el DataFrame no dependa de si
+        pyarrow está instalado.
+        """
+        def open_csv(column_types=None):
+            return pa_csv.open_csv(
                 self.file_path,
-                dtype=str,
-                keep_default_na=False,
-                chunksize=chunk_size
-            )):
+                read_options=pa_csv.ReadOptions(use_threads=True, **read_options),
+                # Equivalente a keep_default_na=False: las celdas vacías se quedan como texto
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=column_types,
+                    null_values=[],
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False
+                )
+            )
+        reader = open_csv()
+        text_columns = {
+            field.name: pyarrow.string() for field in reader.schema
+            if not (pyarrow.types.is_integer(field.type) or pyarrow.types.is_floating(field.type)
+                    or pyarrow.types.is_string(field.type))
+        }
+        if text_columns:
+            reader.close()
+            reader = open_csv(text_columns)
+        return reader
+
+    @staticmethod
+    def _bool_columns(df):
+        """Columnas que el motor C ha convertido a bool (true/false) y deben quedarse como texto"""
+        return [col for col in df.columns if df[col].dtype.kind == 'b']
+
+    def _read_sample_pyarrow(self):
+        """Lee las primeras _sample_rows filas con pyarrow; None si no es posible
+
+        La lectura por bloques de 8 MB se detiene en cuanto se alcanza el
+        número de filas pedido.
+        """
+        if pyarrow is None:
+            return None
+        try:
+            reader = self._open_pyarrow_csv(block_size=8 << 20)
+            batches = []
+            read_rows = 0
+            for batch in reader:
+                if self._is_cancelled or read_rows >= self._sample_rows:
+                    break
+                batches.append(batch)
+                read_rows += batch.num_rows
+            table = pyarrow.Table.from_batches(batches, schema=reader.schema).slice(0, self._sample_rows)
+            del batches
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except Exception as e:
+            print(f"Lector pyarrow no disponible, usando el motor C: {e}")
+            return None
+
+    def _run_sample(self):
+        """Lee una muestra de _sample_rows filas con las columnas numéricas ya tipadas"""
+        try:
+            df = self._read_sample_pyarrow()
+            if df is None:
+                df = pd.read_csv(self.file_path, engine='c', nrows=self._sample_rows, keep_default_na=False)
+                bool_cols = self._bool_columns(df)
+                if bool_cols:
+                    # Se releen como texto para conservar el valor original (true, FALSE...)
+                    df = pd.read_csv(
+                        self.file_path, engine='c', nrows=self._sample_rows, keep_default_na=False,
+                        dtype=dict.fromkeys(bool_cols, str)
+                    )
+            df = self._convert_types(df)
+            if df is None:
+                return
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        if not self._is_cancelled:
+            self.loading_finished.emit(df)
+
+    @staticmethod
+    def _convert_column(column):
+        """Convierte una columna de texto a int64 o float64 si todos sus valores son numéricos"""
+        try:
+            # Operar sobre el ndarray subyacente para evitar callbacks por celda
+            arr = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+            if np.isnan(arr).any():
+                return column
+            # Comparar con su conversión a entero: un único kernel vectorizado
+            # (inf o valores fuera de rango no coinciden y se quedan como float)
+            with np.errstate(invalid='ignore'):
+                as_int = arr.astype(np.int64)
+            if np.array_equal(arr, as_int):
+                return pd.Series(as_int, index=column.index)
+            # Se conserva como float64; el formateo a 3 decimales lo hace la tabla al mostrar
+            return pd.Series(arr, index=column.index)
+        except:
+            return column
+
+    def _convert_types(self, df):
+        """Tipa una sola vez las columnas numéricas que llegaron como texto; None si se cancela"""
+        # Solo se procesan las columnas de texto: las numéricas ya vienen tipadas del parser
+        # y el resto se convierte en paralelo (pd.to_numeric libera el GIL)
+        cols = [col for col in df.columns
+                if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = {executor.submit(self._convert_column, df[col]): col for col in cols}
+            for i, future in enumerate(as_completed(futures)):
                 if self._is_cancelled:
-                    return
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return None
+                col = futures[future]
+                df[col] = future.result()
+                progress = 100 + int(100 * (i + 1) / len(cols))
+                self.progress_updated.emit(
+                    progress,
+                    f"Procesando columna {i+1} de {len(cols)}: {col}"
+                )
+        return df
+
+    def _read_pyarrow(self):
+        """Lee el archivo por lotes con el lector en streaming de pyarrow; None si no es posible
+
+        El parseo ocurre en C++ sin el GIL y los datos se acumulan en memoria
+        columnar de Arrow; solo al final se materializa el DataFrame. La lectura
+        se detiene en cuanto se supera MAX_CSV_ROWS_TO_LOAD.
+        """
+        if pyarrow is None:
+            return None
+        file_name = os.path.basename(self.file_path)
+        try:
+            reader = self._open_pyarrow_csv()
+            batches = []
+            processed_rows = 0
+            for batch in reader:
+                if self._is_cancelled:
+                    return None
+                batches.append(batch)
+                processed_rows += batch.num_rows
+                loaded = min(processed_rows, MAX_CSV_ROWS_TO_LOAD)
+                self.progress_updated.emit(
+                    int(100 * loaded / MAX_CSV_ROWS_TO_LOAD),
+                    f"Cargando {file_name}...\n"
+                    f"Filas procesadas: {loaded:,} ({loaded/MAX_CSV_ROWS_TO_LOAD:.1%})"
+                )
+                if processed_rows > MAX_CSV_ROWS_TO_LOAD:
+                    # Basta con saber que hay más filas del máximo; run() emite el aviso
+                    break
+            table = pyarrow.Table.from_batches(batches, schema=reader.schema)
+            del batches
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except Exception as e:
+            print(f"Lector pyarrow no disponible, usando el motor C: {e}")
+            return None
+
+    def _read_chunked(self, text_columns=()):
+        """Lee el archivo por bloques con el motor C; None si se cancela o hay error
+
+        Cada bloque se copia directamente en columnas preasignadas del tamaño
+        máximo, evitando el pd.concat final. Las columnas de text_columns se leen
+        como texto; si aparece una columna booleana nueva se reinicia la lectura
+        añadiéndola, para conservar su valor original.
+        """
+        columns = None
+        bool_cols = []
+        processed_rows = 0
+        chunk_size = max(1, MAX_CSV_ROWS_TO_LOAD // 10)
+        # El lector se cierra al salir, también cuando se cancela o se supera el máximo
+        with pd.read_csv(
+            self.file_path,
+            engine='c',
+            keep_default_na=False,
+            dtype=dict.fromkeys(text_columns, str) or None,
+            chunksize=chunk_size,
+            iterator=True
+        ) as reader:
+            for chunk in reader:
+                if self._is_cancelled:
+                    return None
+                bool_cols = self._bool_columns(chunk)
+                if bool_cols:
+                    break
                 # Limitar la cantidad de filas cargadas
-                if processed_rows + len(chunk) > MAX_CSV_ROWS_TO_LOAD:
+                truncated = processed_rows + len(chunk) > MAX_CSV_ROWS_TO_LOAD
+                if truncated:
                     chunk = chunk.iloc[:MAX_CSV_ROWS_TO_LOAD - processed_rows]
-                chunks.append(chunk)
-                processed_rows += len(chunk)
+                if columns is None:
+                    columns = {}
+                end = processed_rows + len(chunk)
+                for col in chunk.columns:
+                    values = chunk[col].to_numpy()
+                    dest = columns.get(col)
+                    if dest is None:
+                        dest = columns[col] = np.empty(MAX_CSV_ROWS_TO_LOAD, dtype=values.dtype)
+                    elif not np.can_cast(values.dtype, dest.dtype):
+                        # El bloque no cabe en el tipo inferido hasta ahora (p. ej. int -> float o texto)
+                        dest = columns[col] = dest.astype(np.result_type(dest.dtype, values.dtype))
+                    dest[processed_rows:end] = values
+                processed_rows = end
                 # Emitir progreso
                 progress = int(100 * processed_rows / MAX_CSV_ROWS_TO_LOAD)
                 message = (
                     f"Cargando {os.path.basename(self.file_path)}...\n"
-                    f"Filas procesadas: {processed_rows:,} de {min(total_rows, MAX_CSV_ROWS_TO_LOAD):,} "
-                    f"({min(processed_rows, MAX_CSV_ROWS_TO_LOAD)/MAX_CSV_ROWS_TO_LOAD:.1%})"
+                    f"Filas procesadas: {processed_rows:,} "
+                    f"({processed_rows/MAX_CSV_ROWS_TO_LOAD:.1%})"
                 )
                 self.progress_updated.emit(progress, message)
                 if processed_rows >= MAX_CSV_ROWS_TO_LOAD:
                     # Mensaje especial si hay más de MAX_CSV_ROWS_TO_LOAD filas
-                    if total_rows > MAX_CSV_ROWS_TO_LOAD:
+                    if truncated or next(reader, None) is not None:
                         self.error_occurred.emit(f"El archivo tiene más de {MAX_CSV_ROWS_TO_LOAD} filas")
-                        return
+                        return None
                     break
-            if not chunks:
-                self.error_occurred.emit("No se pudieron cargar datos del archivo.")
+        if bool_cols:
+            return self._read_chunked((*text_columns, *bool_cols))
+        if columns is None:
+            self.error_occurred.emit("No se pudieron cargar datos del archivo.")
+            return None
+        return pd.DataFrame(
+            {col: values[:processed_rows] for col, values in columns.items()}, copy=False
+        )
+
+    def run(self):
+        if self.count_only:
+            self._run_count()
+            return
+        if self._sample_rows is not None:
+            self._run_sample()
+            return
+        try:
+            # Fase 1: Lectura del archivo (una sola pasada, sin contar líneas antes)
+            if os.path.getsize(self.file_path) == 0:
+                raise Exception("El archivo está vacío.")
+            df = self._read_pyarrow()
+            if self._is_cancelled:
                 return
-            df = pd.concat(chunks, ignore_index=True)
+            if df is not None:
+                if len(df) > MAX_CSV_ROWS_TO_LOAD:
+                    self.error_occurred.emit(f"El archivo tiene más de {MAX_CSV_ROWS_TO_LOAD} filas")
+                    return
+            else:
+                df = self._read_chunked()
+                if df is None:
+                    return
             self.progress_updated.emit(100, "Procesando tipos de datos...")
 
             # Fase 2: Conversión de tipos
-            def convert_column(column):
-                try:
-                    float_col = pd.to_numeric(column, errors='coerce')
-                    if float_col.isnull().any():
-                        return column
-                    if all(float_col % 1 == 0):
-                        return float_col.astype(int)
-                    return float_col.map(lambda x: f"{x:.3f}" if not pd.isnull(x) else x)
-                except:
-                    return column
-
-            cols = df.columns
-            for i, col in enumerate(cols):
-                if self._is_cancelled:
-                    return
-                
-                df[col] = convert_column(df[col])
-                progress = 100 + int(100 * (i + 1) / len(cols))
-                self.progress_updated.emit(
-                    progress, 
-                    f"Procesando columna {i+1} de {len(cols)}: {col}"
-                )
+            df = self._convert_types(df)
+            if df is None:
+                return
 
             # Emitir resultado final
             self.loading_finished.emit(df)
@@ -156,6 +414,116 @@ class CSVLoaderThread(QThread):
         except Exception as e:
             self.error_occurred.emit(str(e))
 
+def format_cell(value):
+    """Texto de una celda de la tabla: los valores decimales se muestran con 3 cifras"""
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.3f}"
+    return str(value)
+
+class PandasModel(QAbstractTableModel):
+    """Modelo de tabla que sirve las celdas de un DataFrame bajo demanda.
+
+    La vista solo pide los datos de las celdas visibles, así que no se crea
+    ningún item por celda. Las filas se exponen a la vista por lotes de
+    FETCH_BATCH_ROWS según se desplaza (canFetchMore/fetchMore). El orden de
+    la vista se guarda como un array de posiciones sobre el DataFrame, que
+    nunca se reordena.
+    """
+
+    FETCH_BATCH_ROWS = 1000
+
+    ROW_BRUSHES = (QBrush(QColor('#333333')), QBrush(QColor('#2b2b2b')))
+    TEXT_BRUSH = QBrush(QColor('#ffffff'))
+    TEXT_ALIGNMENT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+    # Estilo común a todas las celdas, resuelto con una sola búsqueda por rol
+    STATIC_ROLES = {
+        Qt.ItemDataRole.TextAlignmentRole: TEXT_ALIGNMENT,
+        Qt.ItemDataRole.ForegroundRole: TEXT_BRUSH,
+    }
+
+    def __init__(self, df=None, parent=None):
+        super().__init__(parent)
+        self._order = None  # Posiciones del DataFrame en el orden de la vista (None = original)
+        self._set_arrays(df)
+
+    def _set_arrays(self, df):
+        """Extrae una vez los arrays de cada columna y del índice para leer celdas sin pasar por pandas"""
+        self._df = df if df is not None else pd.DataFrame()
+        self._columns = [self._df.iloc[:, j].to_numpy() for j in range(self._df.shape[1])]
+        self._index = self._df.index.to_numpy()
+        self._loaded_rows = min(len(self._df), self.FETCH_BATCH_ROWS)
+
+    def set_dataframe(self, df, sort_column=-1, order=Qt.SortOrder.AscendingOrder):
+        """Cambia el DataFrame mostrado; si se da sort_column se mantiene ordenado por ella"""
+        self.beginResetModel()
+        self._set_arrays(df)
+        self._order = self._sorted_order(sort_column, order) if 0 <= sort_column < self._df.shape[1] else None
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded_rows < len(self._df)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH_ROWS, len(self._df) - self._loaded_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
+
+    def source_row(self, row):
+        """Posición en el DataFrame de la fila que la vista muestra en `row`"""
+        return int(self._order[row]) if self._order is not None else row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._df.shape[1]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_cell(self._columns[index.column()][self.source_row(row)])
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self.ROW_BRUSHES[row % 2]
+        if role in self.STATIC_ROLES:
+            return self.STATIC_ROLES[role]
+        if role == Qt.ItemDataRole.UserRole:
+            return self._index[self.source_row(row)]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return str(self._df.columns[section])
+        return str(section + 1)
+
+    def _sorted_order(self, column, order):
+        """Posiciones del DataFrame ordenadas por la columna dada; None si no se puede ordenar"""
+        if self._df.empty:
+            return None
+        try:
+            values = self._df.iloc[:, column].reset_index(drop=True)
+            ascending = order == Qt.SortOrder.AscendingOrder
+            return values.sort_values(ascending=ascending, kind='stable').index.to_numpy()
+        except TypeError:
+            # Columnas con tipos mezclados no comparables: se dejan como están
+            return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        new_order = self._sorted_order(column, order)
+        if new_order is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._order = new_order
+        self.layoutChanged.emit()
+
 class NoSciAxis(pg.AxisItem):
     def tickStrings(self, values, scale, spacing):
         return [f"{v:.3f}".rstrip('0').rstrip('.') if abs(v) < 1e6 else f"{v:.0f}" for v in values]
@@ -179,23 +547,181 @@ class InfiniteGrid(gl.GLGridItem):
         
         self.setGLOptions('opaque')
 
+@_njit
+def _normalize_xyz(xyz):
+    """Reescala cada columna de un bloque (N, 3) float64 al rango [0, 20] en float32.
+
+    Se resta el mínimo en float64 y solo el resultado se pasa a float32, así que
+    ejes con un desplazamiento grande (TOA absolutos en ns) no pierden resolución.
+    Las columnas constantes se dejan tal cual. Devuelve también los mínimos y
+    máximos por eje (float64) para poder normalizar después puntos sueltos.
+    """
+    mn = np.zeros(3, dtype=np.float64)
+    mx = np.zeros(3, dtype=np.float64)
+    out = np.empty(xyz.shape, dtype=np.float32)
+    if xyz.shape[0] == 0:
+        return out, mn, mx
+    for j in range(3):
+        col = xyz[:, j]
+        lo, hi = col.min(), col.max()
+        mn[j] = lo
+        mx[j] = hi
+        if hi != lo:
+            out[:, j] = (col - lo) * (20.0 / (hi - lo))
+        else:
+            out[:, j] = col
+    return out, mn, mx
+
+
+def _palette_rgba(color):
+    """Devuelve el RGBA de un color hex, usando la paleta precalculada cuando es posible"""
+    idx = _VIBRANT_COLOR_INDEX.get(color)
+    if idx is not None:
+        return tuple(VIBRANT_COLORS_RGBA[idx])
+    if color == NOISE_COLOR:
+        return tuple(NOISE_COLOR_RGBA)
+    qcolor = QColor(color)
+    if not qcolor.isValid():
+        print(f"Color inválido: {color}, usando color por defecto")
+        return tuple(NOISE_COLOR_RGBA)
+    return qcolor.getRgbF()
+
+def _m4_indices(x, y, n_pixels, x_range=None):
+    """Índices de los puntos que conserva el diezmado M4 en n_pixels columnas
+
+    Por cada columna de píxel dentro de x_range se conservan cuatro puntos:
+    el primero y el último en X y los de Y mínima y máxima. Si no hay más de
+    cuatro puntos por píxel se devuelven todos.
+    """
+    if x_range is None:
+        idx = np.arange(len(x))
+    else:
+        idx = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]))
+    if len(idx) <= 4 * n_pixels:
+        return idx
+    xs = x[idx]
+    ys = y[idx]
+    x0, x1 = (xs.min(), xs.max()) if x_range is None else x_range
+    span = x1 - x0
+    if span > 0:
+        bins = ((xs - x0) * (n_pixels / span)).astype(np.int64)
+        np.clip(bins, 0, n_pixels - 1, out=bins)
+    else:
+        bins = np.zeros(len(xs), dtype=np.int64)
+    # Ordenar por columna y, dentro de cada una, por Y o por X: los extremos de cada grupo son M4
+    by_y = np.lexsort((ys, bins))
+    by_x = np.lexsort((xs, bins))
+    starts = np.flatnonzero(np.diff(bins[by_y], prepend=-1))
+    ends = np.append(starts[1:], len(bins)) - 1
+    keep = np.unique(np.concatenate((by_x[starts], by_x[ends], by_y[starts], by_y[ends])))
+    return idx[keep]
+
+@_njit(fastmath=False)
+def _pulse_segments_jit(toas, points, max_dist_ns):
+    """Versión compilada de _pulse_segments: una pasada sin arrays temporales"""
+    n, dims = points.shape
+    pos = np.empty((2 * max(n - 1, 0), dims), dtype=points.dtype)
+    cursor = 0
+    prev_ok = False
+    for i in range(n):
+        ok = np.isfinite(toas[i])
+        for j in range(dims):
+            ok = ok and np.isfinite(points[i, j])
+        if ok and prev_ok and abs(toas[i] - toas[i - 1]) <= max_dist_ns:
+            pos[cursor] = points[i - 1]
+            pos[cursor + 1] = points[i]
+            cursor += 2
+        prev_ok = ok
+    return pos[:cursor]
+
+def _gather_rows(coords, idx, valid_mask, step=1):
+    """Filas de coords en las posiciones idx que son válidas, tomando una de cada step"""
+    idx = idx[valid_mask[idx]]
+    return coords[idx[::step]]
+
+
+def _pulse_segments(toas, points, max_dist_ns):
+    """Extremos de los segmentos entre pulsos consecutivos, intercalados por pares
+
+    toas viene ordenado; se une el pulso i con el i+1 si ambos TOAs y ambas
+    posiciones son finitos y los TOAs distan como mucho max_dist_ns.
+    """
+    if numba is not None:
+        return _pulse_segments_jit(toas, np.ascontiguousarray(points), max_dist_ns)
+    finite = np.isfinite(toas) & np.isfinite(points).all(axis=1)
+    valid = finite[:-1] & finite[1:] & (np.abs(np.diff(toas)) <= max_dist_ns)
+    starts = np.flatnonzero(valid)
+    pos = np.empty((2 * len(starts), points.shape[1]), dtype=points.dtype)
+    pos[0::2] = points[starts]
+    pos[1::2] = points[starts + 1]
+    return pos
+
+# Operadores de las expresiones de filtro
+FILTER_GT, FILTER_LT, FILTER_EQ, FILTER_GE, FILTER_LE = range(5)
+
+# Sin fastmath: los NaN (valores no numéricos) deben quedar fuera en cualquier comparación
+@_njit(fastmath=False, parallel=True)
+def _filter_mask_jit(values, ops, thresholds, out):
+    """Versión compilada de _filter_mask: una pasada que salta las filas ya descartadas"""
+    for i in _prange(values.shape[0]):
+        if not out[i]:
+            continue
+        v = values[i]
+        keep = True
+        for k in range(ops.shape[0]):
+            t = thresholds[k]
+            op = ops[k]
+            if op == FILTER_GT:
+                keep = v > t
+            elif op == FILTER_LT:
+                keep = v < t
+            elif op == FILTER_EQ:
+                keep = v == t
+            elif op == FILTER_GE:
+                keep = v >= t
+            else:
+                keep = v <= t
+            if not keep:
+                break
+        out[i] = keep
+
+# Comparación de numpy equivalente a cada operador (camino sin numba)
+_FILTER_UFUNCS = {
+    FILTER_GT: np.greater,
+    FILTER_LT: np.less,
+    FILTER_EQ: np.equal,
+    FILTER_GE: np.greater_equal,
+    FILTER_LE: np.less_equal,
+}
+
+def _filter_mask(values, ops, thresholds, out):
+    """Combina con AND en out las condiciones (ops[k], thresholds[k]) evaluadas sobre values"""
+    if numba is not None:
+        _filter_mask_jit(values, ops, thresholds, out)
+        return
+    for op, t in zip(ops, thresholds):
+        out &= _FILTER_UFUNCS[op](values, t)
+
+
 class GLPlotWidget(gl.GLViewWidget):
     pointSelected = pyqtSignal(int)
     
-    def __init__(self, parent=None, emitter_color_map=None):
+    def __init__(self, parent=None, emitter_color_map=None, use_additive_blending=True):
         super().__init__(parent)
         self.emitter_color_map = emitter_color_map or {}
+        self.use_additive_blending = use_additive_blending
+        self._emitter_rgba = {}  # Caché emisor -> RGBA para no reconvertir colores en cada redibujado
         self.color_index = 0
         self.color_step = 1
         self.setBackgroundColor('#2b2b2b')
         self.setCameraPosition(distance=50, elevation=30, azimuth=45)
         
-        self.scatter = None
         self.highlighted_point = None
         self.df = None
         self.x_col = None
         self.y_col = None
         self.z_col = None
+        self._norm_cache = None
         self.axis_labels = []
         
         # Configurar planos y ejes
@@ -208,18 +734,59 @@ class GLPlotWidget(gl.GLViewWidget):
         self.addItem(self.yz_plane)
         self.add_infinite_axes()
 
-    def clear(self):
-        """Sobrescribe el método clear para manejar correctamente las etiquetas"""
+        # Items de datos persistentes: se actualizan con setData en vez de recrearse
+        self.scatter = gl.GLScatterPlotItem(
+            pos=np.zeros((0, 3), dtype=np.float32),
+            size=4,
+            pxMode=True,
+            glOptions='additive'
+        )
+        self.addItem(self.scatter)
+
+        # Marcador de selección (halo, borde y núcleo), proporcional al rango normalizado (0-20)
+        # Los tres comparten un único búfer (1, 3) float32 que se reescribe en cada selección
+        data_range = 20.0
+        self._highlight_pos = np.zeros((1, 3), dtype=np.float32)
+        self.highlight_items = tuple(
+            gl.GLScatterPlotItem(
+                pos=self._highlight_pos,
+                size=data_range * factor,
+                color=color,
+                pxMode=False,
+                glOptions='additive'
+            )
+            for factor, color in (
+                (0.035, (1, 0, 0, 0.28)),  # halo rojo translúcido
+                (0.018, (1, 0, 0, 0.7)),   # borde rojo intenso
+                (0.011, (1, 0, 0, 1)),     # núcleo rojo puro
+            )
+        )
+        for item in self.highlight_items:
+            item.hide()
+            self.addItem(item)
+
+    def persistent_items(self):
+        """Items que se reutilizan entre redibujados y nunca se eliminan de la escena"""
+        return [self.scatter, *self.highlight_items]
+
+    def clear(self, keep=()):
+        """Sobrescribe el método clear para manejar correctamente las etiquetas
+
+        Los items de ``keep`` se conservan en la escena para reutilizarlos con setData.
+        """
         # Primero eliminar las etiquetas
         if hasattr(self, 'axis_labels'):
             for label in self.axis_labels:
                 self.removeItem(label)
             self.axis_labels.clear()
         
-        # Eliminar todos los demás items
-        items_to_remove = [item for item in self.items if item not in [self.x_axis, self.y_axis, self.z_axis]]
+        # Eliminar todos los demás items salvo los persistentes, que solo se vacían
+        keep = [self.x_axis, self.y_axis, self.z_axis, *self.persistent_items(), *keep]
+        items_to_remove = [item for item in self.items if item not in keep]
         for item in items_to_remove:
             self.removeItem(item)
+        self.scatter.setData(pos=np.zeros((0, 3), dtype=np.float32), color=(1.0, 1.0, 1.0, 1.0))
+        self.clear_highlight()
 
     def create_axis_label(self, pos, text, color):
         """Crea una etiqueta de texto para un eje"""
@@ -263,7 +830,8 @@ class GLPlotWidget(gl.GLViewWidget):
 
         self.update()
 
-    def plot_data(self, df, x_col, y_col, z_col, emitter_col=None):
+    def plot_data(self, df, x_col, y_col, z_col, emitter_col=None, step=1):
+        """Pinta df en 3D; con step > 1 solo se envía a la GPU uno de cada step puntos"""
         try:
             if df is None or x_col not in df.columns or y_col not in df.columns or z_col not in df.columns:
                 return
@@ -272,7 +840,8 @@ class GLPlotWidget(gl.GLViewWidget):
             preserved_items = [self.xy_plane, self.xz_plane, self.yz_plane, 
                              self.x_axis, self.y_axis, self.z_axis]
             preserved_items.extend(self.axis_labels)
-                    
+            preserved_items.extend(self.persistent_items())
+
             # Limpiamos solo los elementos de datos
             items_to_remove = [item for item in self.items if item not in preserved_items]
             for item in items_to_remove:
@@ -283,64 +852,43 @@ class GLPlotWidget(gl.GLViewWidget):
             self.y_col = y_col
             self.z_col = z_col
             
-            x = pd.to_numeric(df[x_col], errors='coerce').fillna(0).values
-            y = pd.to_numeric(df[y_col], errors='coerce').fillna(0).values
-            z = pd.to_numeric(df[z_col], errors='coerce').fillna(0).values
-            
+            # Un único bloque contiguo (N, 3) float64 con los tres ejes; se pasa a float32
+            # solo después de normalizar
+            xyz = df[[x_col, y_col, z_col]].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+            xyz[np.isnan(xyz)] = 0
+
             # Normalizar datos para mejor visualización
-            def normalize(arr):
-                arr_min, arr_max = arr.min(), arr.max()
-                return (arr - arr_min) / (arr_max - arr_min) * 20 if arr_max != arr_min else arr
-                
-            x = normalize(x)
-            y = normalize(y)
-            z = normalize(z)
+            pos, mn, mx = _normalize_xyz(xyz)
+
+            # Guardar los límites de cada eje para que highlight_point no tenga que recalcularlos
+            self._norm_cache = {
+                axis: (float(mn[j]), float(mx[j])) for j, axis in enumerate(('x', 'y', 'z'))
+            }
+
             if emitter_col and emitter_col in df.columns:
-                emitters = df[emitter_col].unique()
-                
-                for emitter in emitters:
-                    mask = (df[emitter_col] == emitter).values
-                    emitter_x = x[mask]
-                    emitter_y = y[mask]
-                    emitter_z = z[mask]
-                    
-                    if len(emitter_x) > 0:
-                        pos = np.column_stack([emitter_x, emitter_y, emitter_z])
-                        color = self.get_emitter_color(emitter, for_3d=True)
-                        
-                        # Convertir color a RGBA normalizado para OpenGL
-                        def to_rgba(color):
-                            if isinstance(color, str):
-                                qcolor = QColor(color)
-                                return (
-                                    qcolor.red() / 255.0,
-                                    qcolor.green() / 255.0,
-                                    qcolor.blue() / 255.0,
-                                    1.0
-                                )
-                            elif isinstance(color, (tuple, list)) and len(color) == 4:
-                                # Si ya es RGBA normalizado
-                                return tuple(float(c) for c in color)
-                            return (0.5, 0.5, 0.5, 1.0)
-                        scatter = gl.GLScatterPlotItem(
-                            pos=pos,
-                            color=to_rgba(color),
-                            size=4,
-                            pxMode=True,
-                            glOptions='additive'
-                        )
-                        self.addItem(scatter)
-            else:
-                pos = np.column_stack([x, y, z])                # Color por defecto en formato RGBA correcto para OpenGL
-                default_color = (0.26, 0.65, 0.96, 1.0)
-                scatter = gl.GLScatterPlotItem(
-                    pos=pos,
-                    color=default_color,
-                    size=4,
-                    pxMode=True,
-                    glOptions='additive'
+                # Una sola pasada: código entero por punto y emisores en orden de aparición,
+                # el mismo orden en que se asignan los colores
+                codes, emitters = pd.factorize(df[emitter_col], use_na_sentinel=False)
+                palette = np.array(
+                    [self.emitter_rgba(emitter) for emitter in emitters],
+                    dtype=np.float32
                 )
-                self.addItem(scatter)
+                colors = palette[codes]
+            else:
+                # Color por defecto en formato RGBA correcto para OpenGL
+                colors = (0.26, 0.65, 0.96, 1.0)
+
+            if step > 1:
+                pos = pos[::step]
+                if isinstance(colors, np.ndarray):
+                    colors = colors[::step]
+
+            # Un único GLScatterPlotItem persistente con color por vértice: una sola llamada de dibujo
+            # La mezcla aditiva resalta la densidad pero satura el relleno con muchos puntos
+            additive = self.use_additive_blending and len(pos) <= ADDITIVE_BLEND_MAX_POINTS
+            self.scatter.setGLOptions('additive' if additive else 'opaque')
+            self.scatter.setData(pos=pos, color=colors, size=4)
+            self.clear_highlight()
             
             self.auto_range()
             
@@ -348,6 +896,13 @@ class GLPlotWidget(gl.GLViewWidget):
             print(f"Error plotting 3D data: {e}")
             QMessageBox.warning(self, "Error", f"No se pudo graficar en 3D:\n{str(e)}")
     
+    def emitter_rgba(self, emitter):
+        """RGBA de un emisor, calculado una sola vez y reutilizado en cada redibujado"""
+        rgba = self._emitter_rgba.get(emitter)
+        if rgba is None:
+            rgba = self._emitter_rgba[emitter] = _palette_rgba(self.get_emitter_color(emitter))
+        return rgba
+
     def get_emitter_color(self, emitter, for_3d=False):
         # Determinar el color base
         if emitter is None or (isinstance(emitter, str) and emitter.strip() == ""):
@@ -393,12 +948,8 @@ class GLPlotWidget(gl.GLViewWidget):
         if for_3d:
             try:
                 if isinstance(color, str):
-                    qcolor = QColor(color)
-                    if not qcolor.isValid():
-                        print(f"Color inválido: {color}, usando color por defecto")
-                        return (0.5, 0.5, 0.5, 1.0)  # Gray as default
-                    # Ensure float values between 0 and 1
-                    return (qcolor.redF(), qcolor.greenF(), qcolor.blueF(), 1.0)
+                    # Paleta y ruido ya están pre-convertidos a RGBA: no se construye ningún QColor
+                    return _palette_rgba(color)
                 elif isinstance(color, (tuple, list)):
                     if len(color) == 3:
                         # Convert RGB to RGBA with alpha=1.0
@@ -420,7 +971,7 @@ class GLPlotWidget(gl.GLViewWidget):
     def auto_range(self):
         bounds = None
         for item in self.items:
-            if isinstance(item, gl.GLScatterPlotItem):
+            if isinstance(item, gl.GLScatterPlotItem) and item.visible():
                 pos = item.pos
                 if pos is not None and len(pos) > 0:
                     min_bounds = pos.min(axis=0)
@@ -441,21 +992,14 @@ class GLPlotWidget(gl.GLViewWidget):
             
     def highlight_point(self, index):
 
-        if index is None or self.df is None or self.x_col is None or self.y_col is None or self.z_col is None:
-            if self.highlighted_point:
-                for item in self.highlighted_point:
-                    if item in self.items:
-                        self.removeItem(item)
-                self.highlighted_point = None
+        if (index is None or self.df is None or self._norm_cache is None or
+                self.x_col is None or self.y_col is None or self.z_col is None):
+            self.clear_highlight()
             return
 
         try:
             if index < 0 or index >= len(self.df):
-                if self.highlighted_point:
-                    for item in self.highlighted_point:
-                        if item in self.items:
-                            self.removeItem(item)
-                    self.highlighted_point = None
+                self.clear_highlight()
                 return
 
             # Obtener valores originales
@@ -463,67 +1007,28 @@ class GLPlotWidget(gl.GLViewWidget):
             y = pd.to_numeric(self.df.iloc[index][self.y_col], errors='coerce')
             z = pd.to_numeric(self.df.iloc[index][self.z_col], errors='coerce')
 
-            # Normalizar igual que en plot_data
-            def normalize_val(val, arr):
-                arr_min, arr_max = arr.min(), arr.max()
+            # Normalizar igual que en plot_data, con los límites ya calculados allí
+            def normalize_val(val, bounds):
+                arr_min, arr_max = bounds
                 if arr_max != arr_min:
                     return (val - arr_min) / (arr_max - arr_min) * 20
                 else:
                     return val
 
-            # Usar los mismos datos que plot_data
-            x_arr = pd.to_numeric(self.df[self.x_col], errors='coerce').fillna(0).values
-            y_arr = pd.to_numeric(self.df[self.y_col], errors='coerce').fillna(0).values
-            z_arr = pd.to_numeric(self.df[self.z_col], errors='coerce').fillna(0).values
-            x = normalize_val(x, x_arr)
-            y = normalize_val(y, y_arr)
-            z = normalize_val(z, z_arr)
+            x = normalize_val(x, self._norm_cache['x'])
+            y = normalize_val(y, self._norm_cache['y'])
+            z = normalize_val(z, self._norm_cache['z'])
 
             if np.isnan(x) or np.isnan(y) or np.isnan(z):
-                if self.highlighted_point:
-                    for item in self.highlighted_point:
-                        if item in self.items:
-                            self.removeItem(item)
-                    self.highlighted_point = None
+                self.clear_highlight()
                 return
 
-            if self.highlighted_point:
-                for item in self.highlighted_point:
-                    if item in self.items:
-                        self.removeItem(item)
-                self.highlighted_point = None
-
-            # Tamaños aún más pequeños y proporcionales al rango normalizado (0-20)
-            data_range = 20.0
-            halo_size = data_range * 0.035  # 0.7
-            border_size = data_range * 0.018  # 0.36
-            core_size = data_range * 0.011  # 0.22
-
-            halo = gl.GLScatterPlotItem(
-                pos=np.array([[x, y, z]]),
-                size=halo_size,
-                color=(1, 0, 0, 0.28),  # rojo translúcido
-                pxMode=False,
-                glOptions='additive'
-            )
-            border = gl.GLScatterPlotItem(
-                pos=np.array([[x, y, z]]),
-                size=border_size,
-                color=(1, 0, 0, 0.7),  # rojo intenso
-                pxMode=False,
-                glOptions='additive'
-            )
-            core = gl.GLScatterPlotItem(
-                pos=np.array([[x, y, z]]),
-                size=core_size,
-                color=(1, 0, 0, 1),  # rojo puro
-                pxMode=False,
-                glOptions='additive'
-            )
-            self.addItem(halo)
-            self.addItem(border)
-            self.addItem(core)
-            self.highlighted_point = (halo, border, core)
+            # Mover los marcadores persistentes escribiendo en su búfer, sin reservar memoria
+            self._highlight_pos[0] = (x, y, z)
+            for item in self.highlight_items:
+                item.setData(pos=self._highlight_pos)
+                item.show()
+            self.highlighted_point = self.highlight_items
 
             current_distance = self.opts['distance']
             self.opts['center'] = pg.Vector(x, y, z)
@@ -531,11 +1036,13 @@ class GLPlotWidget(gl.GLViewWidget):
 
         except Exception as e:
             print(f"Error highlighting 3D point: {e}")
-            if self.highlighted_point:
-                for item in self.highlighted_point:
-                    if item in self.items:
-                        self.removeItem(item)
-                self.highlighted_point = None
+            self.clear_highlight()
+
+    def clear_highlight(self):
+        """Oculta el marcador de selección sin destruir sus items"""
+        for item in self.highlight_items:
+            item.hide()
+        self.highlighted_point = None
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
@@ -604,17 +1111,28 @@ class HistogramWindow(QDialog):
                 # Guardar datos para tooltip
                 plot_widget._hist_x = x
                 plot_widget._hist_y = y
-                plot_widget._hist_series = series  # <-- Guardar la serie real para el tooltip
+                # Valores reales ordenados: el tooltip localiza cada bin con búsqueda binaria
+                plot_widget._hist_series_sorted = np.sort(series.to_numpy(dtype=np.float64))
             else:
                 plot_widget._hist_x = None
                 plot_widget._hist_y = None
-                plot_widget._hist_series = None
+                plot_widget._hist_series_sorted = None
+            plot_widget._hist_text_cache = {}  # Texto del tooltip ya formateado por bin
 
             # Conectar evento de mouse
-            def make_mouse_move_handler(plot_widget):
-                def on_mouse_moved(pos):
+            def make_mouse_move_handler(plot_widget, tooltip_label):
+                # Limitar la frecuencia del tooltip: solo se procesa la última posición cada 30 ms
+                plot_widget._pending_pos = None
+                plot_widget._tip_timer = QTimer(plot_widget)
+                plot_widget._tip_timer.setSingleShot(True)
+                plot_widget._tip_timer.setInterval(30)
+
+                def update_tooltip():
+                    pos = plot_widget._pending_pos
+                    if pos is None:
+                        return
                     if (not hasattr(plot_widget, "_hist_x") or plot_widget._hist_x is None or 
-                        plot_widget._hist_y is None or plot_widget._hist_series is None):
+                        plot_widget._hist_y is None or plot_widget._hist_series_sorted is None):
                         tooltip_label.setVisible(False)
                         return
                     vb = plot_widget.getViewBox()
@@ -623,27 +1141,40 @@ class HistogramWindow(QDialog):
                     y_val = mouse_point.y()
                     x_bins = plot_widget._hist_x
                     y_bins = plot_widget._hist_y
-                    series = plot_widget._hist_series
+                    sorted_vals = plot_widget._hist_series_sorted
                     idx_bin = np.searchsorted(x_bins, x_val, side='right') - 1
                     if 0 <= idx_bin < len(y_bins):
                         bin_left = x_bins[idx_bin]
                         bin_right = x_bins[idx_bin+1]
                         count = y_bins[idx_bin]
                         if bin_left <= x_val < bin_right and y_val >= 0:
-                            # Filtrar los valores que caen en el bin
-                            real_xs = series[(series >= bin_left) & (series < bin_right)]
-                            real_xs_str = ", ".join([f"{v:.3f}" for v in real_xs[:10]])
-                            if len(real_xs) > 10:
-                                real_xs_str += ", ..."
-                            tooltip_label.setText(f"Pulsos: {count}\nValores X: {real_xs_str}")
+                            text = plot_widget._hist_text_cache.get(idx_bin)
+                            if text is None:
+                                # Valores que caen en el bin: un tramo contiguo del array ordenado
+                                lo = np.searchsorted(sorted_vals, bin_left, side='left')
+                                hi = np.searchsorted(sorted_vals, bin_right, side='left')
+                                real_xs = sorted_vals[lo:hi]
+                                real_xs_str = ", ".join([f"{v:.3f}" for v in real_xs[:10]])
+                                if len(real_xs) > 10:
+                                    real_xs_str += ", ..."
+                                text = f"Pulsos: {count}\nValores X: {real_xs_str}"
+                                plot_widget._hist_text_cache[idx_bin] = text
+                            tooltip_label.setText(text)
                             cursor_pos = plot_widget.mapFromGlobal(QtGui.QCursor.pos())
                             tooltip_label.move(cursor_pos.x() + 10, cursor_pos.y() - 20)
                             tooltip_label.setVisible(True)
                             return
                     tooltip_label.setVisible(False)
+
+                def on_mouse_moved(pos):
+                    plot_widget._pending_pos = pos
+                    if not plot_widget._tip_timer.isActive():
+                        plot_widget._tip_timer.start()
+
+                plot_widget._tip_timer.timeout.connect(update_tooltip)
                 return on_mouse_moved
 
-            plot_widget.scene().sigMouseMoved.connect(make_mouse_move_handler(plot_widget))
+            plot_widget.scene().sigMouseMoved.connect(make_mouse_move_handler(plot_widget, tooltip_label))
 
             self.hist_plots.append(plot_widget)
             self.tooltip_labels.append(tooltip_label)
@@ -682,15 +1213,37 @@ class CSVPlotterApp(QMainWindow):
         self.emitter_reference = self.load_emitter_reference()
         self.df = None
         self.filtered_df = None
+        self._is_filtered = False  # False: filtered_df es el propio df, sin copia
         self.emitter_col = None
         self.is_3d_view = False
         self.opengl_available = True
         self.emitter_color_map = {}
+        self._brush_cache = {}  # QBrush compartido por color hex (los colores asignados no cambian)
+        self._color_hex_cache = {}  # Color -> nombre #rrggbb para la leyenda
+        self._pulse_pen_cache = {}  # Color hex -> QPen de las líneas de pulsos 2D
+        self._label_cache = {}  # Emisor -> etiqueta (emitter_reference no cambia tras el arranque)
+        self._coord_cache = {}  # (columnas, dtype) -> coordenadas de filtered_df
+        self._coord_cache_df = None  # filtered_df al que corresponde _coord_cache
+        self._numeric_cache = {}  # Columna -> valores float64 de self.df para los filtros
+        self._numeric_cache_df = None  # df al que corresponde _numeric_cache
+        self._filter_parse_cache = {}  # Texto del filtro -> (operadores, umbrales)
+        self._last_filter = (None, None, None)  # (df, filtered_df, máscara) del último filtrado
+        self._emitter_index = []  # (emisor, posiciones en filtered_df, color) en orden de aparición
+        self._emitter_index_key = None  # (filtered_df, emitter_col) de _emitter_index
         self.legend_window = None
         self.legend_text = None
         self.status_update_timer = None
+        self._busy = 0  # Operaciones pesadas en curso (carga, filtrado, repintado)
         self.last_status_base = ""
+        self._process = psutil.Process(os.getpid()) if psutil is not None else None
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # Primera lectura: fija la referencia de la siguiente
         self.histogram_window = None
+        self.use_additive_blending = True  # Mezcla aditiva en 3D (solo hasta ADDITIVE_BLEND_MAX_POINTS)
+        self.max_plot_points = 200_000  # Puntos enviados a la vista 3D antes de submuestrear (0 = todos)
+        self._full_resolution = False  # Fuerza a pintar todos los puntos (p. ej. al guardar la imagen)
+        self._plot_3d_stride = 1  # Paso de submuestreo del último repintado 3D
+        self._redraw_3d = self.plot_data  # Camino de pintado que dibujó la vista 3D actual
         
         self.init_ui()
         self.showMaximized()
@@ -733,6 +1286,9 @@ class CSVPlotterApp(QMainWindow):
         action_reset.setShortcut(QKeySequence("F5"))
         action_reset.triggered.connect(self.auto_range_action)
 
+        action_max_points = view_menu.addAction("Límite de puntos 3D...")
+        action_max_points.triggered.connect(self.set_max_plot_points)
+
         # Nueva opción para mostrar/ocultar la leyenda
         action_toggle_legend = view_menu.addAction("Mostrar Leyenda")
         action_toggle_legend.setShortcut(QKeySequence("F11"))
@@ -749,16 +1305,16 @@ class CSVPlotterApp(QMainWindow):
         # --- FIN NUEVO ---
 
         # Barra de herramientas para los ejes
-        toolbar = QToolBar("Ejes")
-        toolbar.setMovable(True)
-        self.addToolBar(Qt.ToolBarArea.TopToolBarArea, toolbar)
+        self.toolbar = QToolBar("Ejes")
+        self.toolbar.setMovable(True)
+        self.addToolBar(Qt.ToolBarArea.TopToolBarArea, self.toolbar)
 
         logo_label = QLabel()
         logo_pixmap = QPixmap("logo.png")
         logo_label.setPixmap(logo_pixmap)
         logo_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
         logo_label.setContentsMargins(0, 0, 10, 0)
-        toolbar.addWidget(logo_label)
+        self.toolbar.addWidget(logo_label)
 
         # Comboboxes para los ejes en la barra de herramientas
         # Etiquetas de ejes con color igual al eje en el visor 2D
@@ -766,26 +1322,28 @@ class CSVPlotterApp(QMainWindow):
         x_label = QLabel("Eje X:")
         x_label.setContentsMargins(0, 0, 10, 0)
         x_label.setStyleSheet(f"color: {AXIS_COLORS.x}; font-weight: bold;")
-        toolbar.addWidget(x_label)
+        self.toolbar.addWidget(x_label)
         self.x_combo = QComboBox()
         self.x_combo.setMinimumWidth(150)
-        toolbar.addWidget(self.x_combo)
+        self.toolbar.addWidget(self.x_combo)
 
         y_label = QLabel("Eje Y:")
         y_label.setContentsMargins(0, 0, 10, 0)
         y_label.setStyleSheet(f"color: {AXIS_COLORS.y}; font-weight: bold;")
-        toolbar.addWidget(y_label)
+        self.toolbar.addWidget(y_label)
         self.y_combo = QComboBox()
         self.y_combo.setMinimumWidth(150)
-        toolbar.addWidget(self.y_combo)
+        self.toolbar.addWidget(self.y_combo)
 
-        # Crear pero NO añadir el label y combobox del eje Z todavía
+        # Label y combobox del eje Z: se añaden una vez y solo se muestran en modo 3D
         self.z_label = QLabel("Eje Z:")
         self.z_label.setContentsMargins(0, 0, 10, 0)
         self.z_label.setStyleSheet(f"color: {AXIS_COLORS.z}; font-weight: bold;")  # Azul eje Z
         self.z_combo = QComboBox()
         self.z_combo.setMinimumWidth(150)
-        # No añadir aquí: toolbar.addWidget(self.z_label), toolbar.addWidget(self.z_combo)
+        self._z_actions = (self.toolbar.addWidget(self.z_label), self.toolbar.addWidget(self.z_combo))
+        for action in self._z_actions:
+            action.setVisible(False)
 
         # Área dividida para gráfico y tabla
         splitter = QSplitter(Qt.Orientation.Vertical)
@@ -799,6 +1357,16 @@ class CSVPlotterApp(QMainWindow):
         self.plot_2d = pg.PlotWidget(axisItems={'bottom': NoSciAxis(orientation='bottom')})
         self.plot_2d.highlighted_point = None
         self.plot_2d.highlight_point = self.highlight_point_2d
+        # Marcador de selección persistente: se mueve con setData en lugar de recrearse
+        self.plot_2d.highlight_item = pg.ScatterPlotItem(
+            size=12,
+            pen=pg.mkPen('r', width=2),
+            brush=pg.mkBrush((0, 0, 0, 0)),
+            symbol='o'
+        )
+        self.plot_2d.highlight_item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.plot_2d.highlight_item.hide()
+        self.plot_2d.addItem(self.plot_2d.highlight_item)
         self.plot_2d.setLabel('bottom', 'X', color=AXIS_COLORS.x)
         self.plot_2d.setLabel('left', 'Y', color=AXIS_COLORS.y)
         self.plot_2d.showGrid(x=True, y=True, alpha=0.3)
@@ -808,9 +1376,23 @@ class CSVPlotterApp(QMainWindow):
         self.plot_2d.getAxis('bottom').setPen(pg.mkPen(AXIS_COLORS.x, width=2))
         self.plot_2d.getAxis('left').setPen(pg.mkPen(AXIS_COLORS.y, width=2))
 
+        # Diezmado M4 del gráfico 2D: se recalcula (como mucho cada 50 ms) al cambiar el rango X
+        self._m4_series = []  # (scatter, x, y, índices de los extremos globales)
+        # Series de dispersión por emisor, reutilizadas entre repintados: {(emisor, color): item}
+        self._scatter_items_2d = {}
+        self._scatter_items_3d = {}
+        self._m4_timer = QTimer(self)
+        self._m4_timer.setSingleShot(True)
+        self._m4_timer.setInterval(50)
+        self._m4_timer.timeout.connect(self.refresh_2d_downsampling)
+        self.plot_2d.getViewBox().sigXRangeChanged.connect(lambda *args: self._m4_timer.start())
+
         # Intentar crear gráfico 3D
         try:
-            self.plot_3d = GLPlotWidget(emitter_color_map=self.emitter_color_map)
+            self.plot_3d = GLPlotWidget(
+                emitter_color_map=self.emitter_color_map,
+                use_additive_blending=self.use_additive_blending
+            )
         except Exception as e:
             print(f"Error al inicializar GLPlotWidget: {e}")
             self.opengl_available = False
@@ -820,6 +1402,11 @@ class CSVPlotterApp(QMainWindow):
             self.toggle_3d_action.setEnabled(False)
             self.z_combo.setEnabled(False)
 
+        # Con OpenGL disponible, el gráfico 2D también pinta sobre un viewport OpenGL
+        # (solo si la plataforma puede crear un contexto; si no, sigue con QPainter)
+        if self.opengl_available and QOpenGLContext().create():
+            self.plot_2d.useOpenGL(True)
+
         self.plot_layout.addWidget(self.plot_2d)
         self.plot_3d.hide()
 
@@ -840,10 +1427,24 @@ class CSVPlotterApp(QMainWindow):
         filter_buttons_layout.addWidget(self.apply_filters_btn)
         table_container_layout.addWidget(filter_buttons_widget)
 
-        self.table_widget = QTableWidget()
-        self.table_widget.setSortingEnabled(False)
-        self.table_widget.itemSelectionChanged.connect(self.on_table_selection_changed)
-        table_container_layout.addWidget(self.table_widget)
+        # Fila de filtros encima de la tabla, una caja por columna
+        self.filter_bar = QWidget()
+        self.filter_bar_layout = QHBoxLayout(self.filter_bar)
+        self.filter_bar_layout.setContentsMargins(0, 0, 0, 0)
+        self.filter_bar_layout.setSpacing(0)
+        self.filter_columns = []
+        self.filter_edits = []
+        table_container_layout.addWidget(self.filter_bar)
+
+        self.table_model = PandasModel()
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        self.table_view.setSortingEnabled(True)
+        # Sin columna de orden hasta que el usuario pulse una cabecera (orden del archivo)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.selectionModel().selectionChanged.connect(self.on_table_selection_changed)
+        self.table_view.horizontalHeader().sectionResized.connect(self.sync_filter_widths)
+        table_container_layout.addWidget(self.table_view)
 
         self.central_splitter.addWidget(self.plot_container)
         self.central_splitter.addWidget(self.table_container)
@@ -875,14 +1476,55 @@ class CSVPlotterApp(QMainWindow):
         # Configurar estilos
         self.configure_styles()
 
-        self.x_combo.currentTextChanged.connect(self.plot_data)
-        self.y_combo.currentTextChanged.connect(self.plot_data)
-        self.z_combo.currentTextChanged.connect(self.plot_data)
+        # Los cambios de columna se agrupan: solo se repinta 50 ms después del último cambio
+        self._replot_timer = QTimer(self)
+        self._replot_timer.setSingleShot(True)
+        self._replot_timer.setInterval(50)
+        self._replot_timer.timeout.connect(self.plot_data)
+        self.x_combo.currentTextChanged.connect(self.request_replot)
+        self.y_combo.currentTextChanged.connect(self.request_replot)
+        self.z_combo.currentTextChanged.connect(self.request_replot)
         # Conectar para actualizar los nombres de los ejes 3D
         self.x_combo.currentTextChanged.connect(self.update_3d_axis_labels)
         self.y_combo.currentTextChanged.connect(self.update_3d_axis_labels)
         self.z_combo.currentTextChanged.connect(self.update_3d_axis_labels)
 
+        # Intro en las cajas de filtro: las pulsaciones seguidas se agrupan en un solo filtrado
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self.apply_filters)
+
+    def request_replot(self):
+        self._replot_timer.start()  # Reinicia la cuenta si ya estaba pendiente
+
+    def plot_stride(self, n_points):
+        """Paso de submuestreo para no enviar a la vista 3D más de max_plot_points puntos"""
+        if self._full_resolution or not self.max_plot_points or n_points <= self.max_plot_points:
+            return 1
+        return int(np.ceil(n_points / self.max_plot_points))
+
+    def plot_3d_stride(self, n_points):
+        """plot_stride para el repintado 3D en curso; lo guarda para save_image y lo notifica"""
+        step = self._plot_3d_stride = self.plot_stride(n_points)
+        if step > 1:
+            self.statusBar().showMessage(f"Vista 3D: mostrando 1 de cada {step} puntos", 3000)
+        return step
+
+    def set_max_plot_points(self):
+        value, ok = QInputDialog.getInt(
+            self, "Límite de puntos 3D",
+            "Máximo de puntos a pintar en 3D (0 = sin límite):",
+            self.max_plot_points, 0, 100_000_000, 50_000
+        )
+        if ok and value != self.max_plot_points:
+            self.max_plot_points = value
+            if self.is_3d_view:
+                self.plot_data()
+
+    def request_filters(self):
+        self._filter_timer.start()  # Reinicia la cuenta si ya estaba pendiente
+
     def update_3d_axis_labels(self):
         if self.is_3d_view and self.opengl_available:
             self.plot_3d.add_infinite_axes(
@@ -924,8 +1566,8 @@ class CSVPlotterApp(QMainWindow):
         self.clear_filters_btn.setStyleSheet(button_style)
         
         # Estilo para tabla
-        self.table_widget.setStyleSheet("""
-            QTableWidget {
+        self.table_view.setStyleSheet("""
+            QTableView {
                 background-color: #2b2b2b;
                 color: #ffffff;
                 gridline-color: #3e3e3e;
@@ -938,23 +1580,21 @@ class CSVPlotterApp(QMainWindow):
                 border: 1px solid #3e3e3e;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 border: 1px solid #3e3e3e;
                 padding: 4px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #4a4a4a;
                 color: #ffffff;
             }
         """)
-        self.table_widget.horizontalHeader().setSectionsClickable(True)
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table_view.horizontalHeader().setSectionsClickable(True)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
 
     def highlight_point_2d(self, index):
         if index is None or self.filtered_df is None:
-            if hasattr(self.plot_2d, 'highlighted_point') and self.plot_2d.highlighted_point:
-                self.plot_2d.removeItem(self.plot_2d.highlighted_point)
-                self.plot_2d.highlighted_point = None
+            self.clear_highlight_2d()
             return
             
         try:
@@ -964,21 +1604,13 @@ class CSVPlotterApp(QMainWindow):
             if x_col not in self.filtered_df.columns or y_col not in self.filtered_df.columns:
                 return
                 
-            x = float(self.filtered_df.iloc[index][x_col])
-            y = float(self.filtered_df.iloc[index][y_col])
+            # Las columnas ya vienen tipadas: acceso escalar directo, sin parsear texto
+            x = self.filtered_df[x_col].iat[index]
+            y = self.filtered_df[y_col].iat[index]
             
-            if hasattr(self.plot_2d, 'highlighted_point') and self.plot_2d.highlighted_point:
-                self.plot_2d.removeItem(self.plot_2d.highlighted_point)
-                
-            self.plot_2d.highlighted_point = pg.ScatterPlotItem(
-                x=[x],
-                y=[y],
-                size=12,
-                pen=pg.mkPen('r', width=2),
-                brush=pg.mkBrush((0, 0, 0, 0)),
-                symbol='o'
-            )
-            self.plot_2d.addItem(self.plot_2d.highlighted_point)
+            self.plot_2d.highlight_item.setData(x=[x], y=[y])
+            self.plot_2d.highlight_item.show()
+            self.plot_2d.highlighted_point = self.plot_2d.highlight_item
             
             view_box = self.plot_2d.getViewBox()
             current_range = view_box.viewRange()
@@ -992,9 +1624,21 @@ class CSVPlotterApp(QMainWindow):
             
         except Exception as e:            
             print(f"Error highlighting 2D point: {e}")
-            if hasattr(self.plot_2d, 'highlighted_point') and self.plot_2d.highlighted_point:
-                self.plot_2d.removeItem(self.plot_2d.highlighted_point)
-                self.plot_2d.highlighted_point = None
+            self.clear_highlight_2d()
+
+    def clear_highlight_2d(self):
+        """Oculta el marcador de selección 2D sin sacarlo de la escena"""
+        self.plot_2d.highlight_item.hide()
+        self.plot_2d.highlighted_point = None
+
+    def clear_plot_2d(self, keep=()):
+        """Vacía el gráfico 2D conservando el marcador de selección y los items de ``keep``"""
+        keep = [self.plot_2d.highlight_item, *keep]
+        for item in list(self.plot_2d.getPlotItem().items):
+            if item not in keep:
+                self.plot_2d.removeItem(item)
+        self._m4_series = []
+        self.clear_highlight_2d()
 
     def toggle_3d_view(self):
         print("\nDebug: Iniciando toggle_3d_view")
@@ -1010,13 +1654,8 @@ class CSVPlotterApp(QMainWindow):
         
         # Mostrar/ocultar combobox y etiqueta del eje Z correctamente
         if self.is_3d_view:
-            # Añadir al toolbar si no están
-            if self.z_label.parent() is None:
-                self.findChild(QToolBar).addWidget(self.z_label)
-            if self.z_combo.parent() is None:
-                self.findChild(QToolBar).addWidget(self.z_combo)
-            self.z_label.show()
-            self.z_combo.show()
+            for action in self._z_actions:
+                action.setVisible(True)
             self.plot_layout.removeWidget(self.plot_2d)
             self.plot_2d.hide()
             self.plot_layout.removeWidget(self.plot_2d)
@@ -1039,19 +1678,10 @@ class CSVPlotterApp(QMainWindow):
                     for col in [self.x_combo.currentText(), 
                               self.y_combo.currentText(), 
                               self.z_combo.currentText()])):
-                self.plot_3d.plot_data(
-                    df=self.filtered_df,
-                    x_col=self.x_combo.currentText(),
-                    y_col=self.y_combo.currentText(),
-                    z_col=self.z_combo.currentText(),
-                    emitter_col=self.emitter_col
-                )
+                self.plot_3d_widget_data()
         else:
-            # Quitar del toolbar si están
-            if self.z_label.parent() is not None:
-                self.findChild(QToolBar).removeWidget(self.z_label)
-            if self.z_combo.parent() is not None:
-                self.findChild(QToolBar).removeWidget(self.z_combo)
+            for action in self._z_actions:
+                action.setVisible(False)
             self.plot_layout.removeWidget(self.plot_3d)
             self.plot_3d.hide()
             self.plot_layout.removeWidget(self.plot_3d)
@@ -1065,21 +1695,28 @@ class CSVPlotterApp(QMainWindow):
             if self.filtered_df is not None:
                 self.plot_data()
         
-        print(f"Debug: Finalizado toggle_3d_view. Widget Z visible: {self.z_widget.isVisible()}")
-
+        print(f"Debug: Finalizado toggle_3d_view. Widget Z visible: {self._z_actions[1].isVisible()}")
+
+
+    def plot_3d_widget_data(self):
+        """Pinta filtered_df con GLPlotWidget.plot_data (ejes normalizados) respetando max_plot_points"""
+        self._redraw_3d = self.plot_3d_widget_data
+        self.plot_3d.plot_data(
+            df=self.filtered_df,
+            x_col=self.x_combo.currentText(),
+            y_col=self.y_combo.currentText(),
+            z_col=self.z_combo.currentText(),
+            emitter_col=self.emitter_col,
+            # GLPlotWidget pinta todas las filas (los valores no numéricos van a 0)
+            step=self.plot_3d_stride(len(self.filtered_df))
+        )
 
     def reset_3d_view(self):
         if self.is_3d_view and self.opengl_available:
             self.plot_3d.clear()
             self.plot_3d.add_infinite_axes()
             if self.filtered_df is not None:
-                self.plot_3d.plot_data(
-                    df=self.filtered_df,
-                    x_col=self.x_combo.currentText(),
-                    y_col=self.y_combo.currentText(),
-                    z_col=self.z_combo.currentText(),
-                    emitter_col=self.emitter_col
-                )
+                self.plot_3d_widget_data()
             self.plot_3d.auto_range()
             self.clear_highlights()
 
@@ -1108,34 +1745,35 @@ class CSVPlotterApp(QMainWindow):
 
     def update_legend(self, data):
         """Actualizar la leyenda con los emisores visibles en los datos proporcionados."""
-        print("\nDebug update_legend:")
-        print(f"legend_text exists: {self.legend_text is not None}")
-        print(f"data exists: {data is not None}")
-        print(f"data empty: {data.empty if data is not None else True}")
-        print(f"emitter_col: {self.emitter_col}")
-        print(f"columns in data: {data.columns.tolist() if data is not None else []}")
-        
         if not self.legend_text or data is None or data.empty or self.emitter_col not in data.columns:
-            print("Debug: No se puede actualizar la leyenda - condiciones no cumplidas")
             if self.legend_text:
                 self.legend_text.clear()
             return
 
-        emitters = sorted(data[self.emitter_col].unique(), key=lambda x: (x == -1, x))
-        print(f"Debug: Emisores encontrados: {emitters}")
-        legend_content = ""
-
-        for emitter in emitters:
-            color = self.get_emitter_color(emitter)
-            label = self.get_emitter_label(emitter)
-            color_hex = pg.mkColor(color).name()
-            legend_content += f'<span style="color:{color_hex};">⬤</span> {label}<br>'
-            print(f"Debug: Añadido emisor {emitter} con etiqueta {label} y color {color_hex}")
+        emitter_values = data[self.emitter_col]
+        if emitter_values.dtype == 'category':
+            # Unique sobre los códigos enteros en lugar de sobre los valores
+            codes = np.unique(emitter_values.cat.codes.to_numpy())
+            present = emitter_values.cat.categories[codes[codes >= 0]]
+        else:
+            present = emitter_values.unique()
+        emitters = sorted(present, key=lambda x: (x == -1, x))
+        legend_content = "".join(
+            f'<span style="color:{self.color_hex_name(self.get_emitter_color(emitter))};">⬤</span> '
+            f'{self.get_emitter_label(emitter)}<br>'
+            for emitter in emitters
+        )
 
-        print(f"Debug: Contenido final de la leyenda:\n{legend_content}")
         self.legend_text.setHtml(legend_content)
 
     def get_emitter_label(self, emitter):
+        """Devuelve el nombre descriptivo del emisor, calculado una sola vez por valor"""
+        label = self._label_cache.get(emitter)
+        if label is None:
+            label = self._label_cache[emitter] = self._emitter_label(emitter)
+        return label
+
+    def _emitter_label(self, emitter):
         """Devuelve el nombre descriptivo del emisor según reglas de ruido."""
         # Si viene vacío, None o no convertible a int, tratar como desconocido
         if emitter is None or (isinstance(emitter, str) and emitter.strip() == ""):
@@ -1161,67 +1799,91 @@ class CSVPlotterApp(QMainWindow):
         if not file_path:
             return
 
-        # Contar filas totales del archivo
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            total_rows = sum(1 for _ in f)
-
-        # Si el archivo tiene más de MAX_CSV_ROWS_TO_LOAD filas, cargar solo MAX_CSV_ROWS_TO_LOAD y avisar
-        if total_rows > MAX_CSV_ROWS_TO_LOAD:
-            sample_rows = MAX_CSV_ROWS_TO_LOAD
-            df = pd.read_csv(file_path, nrows=sample_rows, dtype=str, keep_default_na=False)
-            self.df = df
-            self.filtered_df = self.df.copy()
-            # Buscar columna de emisor (igual que en finish_loading)
-            self.emitter_col = None
-            frec_cols = [col for col in self.df.columns if "emitter" in col.lower()]
-            if frec_cols:
-                self.emitter_col = frec_cols[0]
-            self.update_combo_values()
-            self.display_data_table()
-            self.plot_data()
-            self.statusBar().showMessage(
-                f"Se han cargado solo {MAX_CSV_ROWS_TO_LOAD:,} filas. El archivo tiene más de {MAX_CSV_ROWS_TO_LOAD:,} filas. Puede cargar más desde el diálogo.", 10000
-            )
-            # Mostrar diálogo de opciones después de cargar y graficar
-            dlg = CSVLoadOptionsDialog(self, total_rows, sample_rows)
-            if dlg.exec() == QDialog.DialogCode.Accepted:
-                if dlg.selected_option == 'sample':
-                    # No hacer nada, ya está cargada la muestra
-                    pass
-                elif dlg.selected_option == 'all':
-                    self._reload_csv_rows(file_path, total_rows)
-                elif dlg.selected_option == 'custom':
-                    self._reload_csv_rows(file_path, dlg.selected_rows)
-                elif dlg.selected_option == 'extra':
-                    self._reload_csv_rows(file_path, dlg.selected_rows)
-                # Si cancela, se queda con la muestra
-            return
-
         file_name = os.path.basename(file_path)
+        # El diálogo aparece de inmediato en modo indeterminado mientras se cuentan las filas
         self.progress = QProgressDialog(
-            f"Preparando carga de {file_name}...",
-            "Cancelar", 0, 200, self
+            f"Contando filas de {file_name}...",
+            "Cancelar", 0, 0, self
         )
         self.progress.setWindowTitle(f"Cargando {file_name}")
         self.progress.setWindowModality(Qt.WindowModality.NonModal)  # <-- Siempre NonModal
         self.progress.setMinimumDuration(0)
-        self.progress.setValue(0)
         self.progress.setAutoClose(False)
         self.progress.canceled.connect(self.cancel_loading)
         self.progress.show()
 
-        # 1. Mostrar diálogo de carga
-        self.progress.setLabelText("Preparando carga de datos...")
-        self.progress.setValue(10)
-        QApplication.processEvents()
+        # Un hilo de una carga anterior no puede perder su última referencia mientras corre
+        previous = getattr(self, 'loader_thread', None)
+        if previous is not None and previous.isRunning():
+            previous.cancel()
+            previous.wait()
 
-        # 2. Lanzar hilo para cargar el archivo completo usando CSVLoaderThread
-        self.loader_thread = CSVLoaderThread(file_path)
-        self.loader_thread.progress_updated.connect(self.update_progress)
-        self.loader_thread.loading_finished.connect(lambda df: self.finish_loading(df, file_path))
+        # 1. Contar filas en un hilo aparte; la decisión se toma al recibir rows_counted
+        self.loader_thread = CSVLoaderThread(file_path, count_only=True)
+        self.loader_thread.rows_counted.connect(lambda total_rows: self.on_rows_counted(file_path, total_rows))
         self.loader_thread.error_occurred.connect(self.handle_loading_error)
         self.loader_thread.start()
 
+    def on_rows_counted(self, file_path, total_rows):
+        # El mismo hilo lee después los datos; la señal llega justo antes de que termine
+        # el recuento, así que se espera a que acabe para poder volver a arrancarlo
+        loader = self.loader_thread
+        loader.wait()
+        if loader.is_cancelled():
+            return
+
+        # Si el archivo tiene más de MAX_CSV_ROWS_TO_LOAD filas, cargar solo MAX_CSV_ROWS_TO_LOAD y avisar
+        if total_rows > MAX_CSV_ROWS_TO_LOAD:
+            self.progress.setLabelText(f"Leyendo las primeras {MAX_CSV_ROWS_TO_LOAD:,} filas...")
+            loader.load_sample(MAX_CSV_ROWS_TO_LOAD)
+            loader.loading_finished.connect(
+                lambda df: self.finish_sample_loading(df, file_path, total_rows)
+            )
+            loader.start()
+            return
+
+        # 2. Cargar el archivo completo con el mismo CSVLoaderThread
+        self.progress.setRange(0, 200)
+        self.progress.setLabelText("Preparando carga de datos...")
+        self.progress.setValue(10)
+        loader.load_all()
+        loader.progress_updated.connect(self.update_progress)
+        loader.loading_finished.connect(lambda df: self.finish_loading(df, file_path))
+        loader.start()
+
+    def finish_sample_loading(self, df, file_path, total_rows):
+        if hasattr(self, 'progress') and self.progress.isVisible():
+            self.progress.close()
+        sample_rows = len(df)
+        self.df = df
+        # Buscar columna de emisor (igual que en finish_loading)
+        self.emitter_col = None
+        frec_cols = [col for col in self.df.columns if "emitter" in col.lower()]
+        if frec_cols:
+            self.emitter_col = frec_cols[0]
+        self.categorize_emitter_column()
+        self.filtered_df = self.df
+        self._is_filtered = False
+        self.update_combo_values()
+        self.display_data_table()
+        self.plot_data()
+        self.statusBar().showMessage(
+            f"Se han cargado solo {MAX_CSV_ROWS_TO_LOAD:,} filas. El archivo tiene más de {MAX_CSV_ROWS_TO_LOAD:,} filas. Puede cargar más desde el diálogo.", 10000
+        )
+        # Mostrar diálogo de opciones después de cargar y graficar
+        dlg = CSVLoadOptionsDialog(self, total_rows, sample_rows)
+        if dlg.exec() == QDialog.DialogCode.Accepted:
+            if dlg.selected_option == 'sample':
+                # No hacer nada, ya está cargada la muestra
+                pass
+            elif dlg.selected_option == 'all':
+                self._reload_csv_rows(file_path, total_rows)
+            elif dlg.selected_option == 'custom':
+                self._reload_csv_rows(file_path, dlg.selected_rows)
+            elif dlg.selected_option == 'extra':
+                self._reload_csv_rows(file_path, dlg.selected_rows)
+            # Si cancela, se queda con la muestra
+
     def cancel_loading(self):
         if hasattr(self, 'loader_thread'):
             self.loader_thread.cancel()
@@ -1235,10 +1897,16 @@ class CSVPlotterApp(QMainWindow):
         QApplication.processEvents()
 
     def finish_loading(self, df, file_path):
+        self._busy += 1
+        try:
+            self._finish_loading(df, file_path)
+        finally:
+            self._busy -= 1
+
+    def _finish_loading(self, df, file_path):
         try:
             # Procesamiento rápido en el hilo principal
             self.df = df
-            self.filtered_df = self.df.copy()
             
             # Buscar columna de emisor
             self.emitter_col = None
@@ -1256,6 +1924,10 @@ class CSVPlotterApp(QMainWindow):
             print(f"\nDebug finish_loading: Buscando columna de emisor")
             print(f"Columnas disponibles: {self.df.columns.tolist()}")
             print(f"Columna de emisor seleccionada: {self.emitter_col}")
+            self.categorize_emitter_column()
+            # Sin filtros, filtered_df comparte el DataFrame cargado en lugar de duplicarlo
+            self.filtered_df = self.df
+            self._is_filtered = False
             
             # Mensaje especial si hay más de 100000 filas
             num_registros = len(self.df)
@@ -1284,24 +1956,62 @@ class CSVPlotterApp(QMainWindow):
         except Exception as e:
             self.handle_loading_error(str(e))
 
+    def categorize_emitter_column(self):
+        """Convierte la columna de emisor a categórica: leyenda, colores y filtros trabajan con códigos enteros"""
+        if self.emitter_col and self.df[self.emitter_col].dtype != 'category':
+            self.df[self.emitter_col] = self.df[self.emitter_col].astype('category')
+
+    def emitter_indices(self):
+        """Tríos (emisor, posiciones en filtered_df, color hex) en orden de aparición
+
+        Se calculan con una sola ordenación estable de los códigos enteros y se
+        reutilizan mientras filtered_df sea el mismo objeto, así que cambiar de
+        columnas o de vista no vuelve a agrupar los puntos.
+        """
+        key = (self.filtered_df, self.emitter_col)
+        if self._emitter_index_key is None or any(a is not b for a, b in zip(key, self._emitter_index_key)):
+            values = self.filtered_df[self.emitter_col]
+            if values.dtype == 'category':
+                codes = values.cat.codes.to_numpy()
+                categories = values.cat.categories
+            else:
+                codes, categories = pd.factorize(values, use_na_sentinel=False)
+            groups = []
+            if len(codes):
+                order = np.argsort(codes, kind='stable')
+                groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+                # La ordenación es estable: el primer índice de cada grupo es su primera aparición
+                groups.sort(key=lambda idx: idx[0])
+            emitters = [categories[codes[idx[0]]] if codes[idx[0]] >= 0 else None for idx in groups]
+            # El color de cada emisor se resuelve aquí una vez, en el mismo orden de aparición
+            self._emitter_index = [
+                (emitter, idx, self._emitter_hex_color(emitter)) for emitter, idx in zip(emitters, groups)
+            ]
+            self._emitter_index_key = key
+        return self._emitter_index
+
     def update_status_bar_with_resources(self):
+        # Durante una carga, un filtrado o un repintado no se consultan recursos
+        if self._busy:
+            return
         status = self.last_status_base
-        try:
-            import psutil
-            import os
-            process = psutil.Process(os.getpid())
-            ram_mb = process.memory_info().rss / (1024 * 1024)
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            status += f" | RAM: {ram_mb:.1f} MB | CPU: {cpu_percent:.1f}%"
-        except Exception:
-            pass
+        if self._process is not None:
+            try:
+                ram_mb = self._process.memory_info().rss / (1024 * 1024)
+                # Sin intervalo no bloquea: uso medio desde la lectura anterior
+                cpu_percent = psutil.cpu_percent(interval=None)
+                status += f" | RAM: {ram_mb:.1f} MB | CPU: {cpu_percent:.1f}%"
+            except Exception:
+                pass
         self.statusBar().showMessage(status)
 
     def start_status_update_timer(self):
-        if self.status_update_timer is not None:
-            self.status_update_timer.stop()
-        self.status_update_timer = QTimer(self)
-        self.status_update_timer.timeout.connect(self.update_status_bar_with_resources)
+        if self.status_update_timer is None:
+            self.status_update_timer = QTimer(self)
+            # La precisión no importa: un temporizador grueso permite al sistema agrupar despertares
+            self.status_update_timer.setTimerType(Qt.TimerType.CoarseTimer)
+            self.status_update_timer.timeout.connect(self.update_status_bar_with_resources)
+            QApplication.instance().aboutToQuit.connect(self.status_update_timer.stop)
         self.status_update_timer.start(10000)  # 10 segundos
 
     def handle_loading_error(self, error_msg):
@@ -1352,57 +2062,63 @@ class CSVPlotterApp(QMainWindow):
     def display_data_table(self):
         if self.filtered_df is None:
             return
-        
-        self.table_widget.itemSelectionChanged.disconnect()
-        
-        self.table_widget.setRowCount(self.filtered_df.shape[0] + 1)  # +1 para la fila de filtros
-        self.table_widget.setColumnCount(self.filtered_df.shape[1])
-        self.table_widget.setHorizontalHeaderLabels(self.filtered_df.columns)
-        
-        for col in range(self.filtered_df.shape[1]):
-            if not self.table_widget.cellWidget(0, col):
-                filter_edit = QLineEdit()
-                filter_edit.setPlaceholderText("Filtrar...")
-                # Cambiar el color de fondo y texto del tooltip para modo oscuro
-                filter_edit.setToolTip(
-                    "<span style='color:#fff; background-color:#232323;'>"
-                    "Ayuda para Filtros:<br>"
-                    "- '&gt;' o '&lt;': Mayor o menor.<br>"
-                    "- '=': Igual a.<br>"
-                    "- 'min:max': Intervalo (ej. 10:20).<br>"
-                    "- ':max': Menor o igual a max.<br>"
-                    "- 'min:': Mayor o igual a min."
-                    "</span>"
-                )
-                self.table_widget.setCellWidget(0, col, filter_edit)
-
-        for i, (index, row) in enumerate(self.filtered_df.iterrows()):
-            for j, value in enumerate(row):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                item.setData(Qt.ItemDataRole.UserRole, index)
 
-                if i % 2 == 0:
-                    item.setBackground(QColor('#333333'))
-                else:
-                    item.setBackground(QColor('#2b2b2b'))
+        # El modelo sirve las celdas bajo demanda: basta con cambiarle el DataFrame
+        # Los datos nuevos se muestran con el mismo orden que indica la cabecera
+        header = self.table_view.horizontalHeader()
+        self.table_model.set_dataframe(
+            self.filtered_df, header.sortIndicatorSection(), header.sortIndicatorOrder()
+        )
+        self.update_filter_edits(list(self.filtered_df.columns))
 
-                item.setForeground(QBrush(QColor('#ffffff')))
-                self.table_widget.setItem(i + 1, j, item)
+    def update_filter_edits(self, columns):
+        """Recrea las cajas de filtro solo si han cambiado las columnas"""
+        if columns == self.filter_columns:
+            return
+        while self.filter_bar_layout.count():
+            widget = self.filter_bar_layout.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        self.filter_columns = columns
+        self.filter_edits = []
+        for _ in columns:
+            filter_edit = QLineEdit()
+            filter_edit.setPlaceholderText("Filtrar...")
+            # Cambiar el color de fondo y texto del tooltip para modo oscuro
+            filter_edit.setToolTip(
+                "<span style='color:#fff; background-color:#232323;'>"
+                "Ayuda para Filtros:<br>"
+                "- '&gt;' o '&lt;': Mayor o menor.<br>"
+                "- '=': Igual a.<br>"
+                "- 'min:max': Intervalo (ej. 10:20).<br>"
+                "- ':max': Menor o igual a max.<br>"
+                "- 'min:': Mayor o igual a min."
+                "</span>"
+            )
+            filter_edit.returnPressed.connect(self.request_filters)
+            self.filter_bar_layout.addWidget(filter_edit)
+            self.filter_edits.append(filter_edit)
+        self.filter_bar_layout.addStretch()
+        self.sync_filter_widths()
+
+    def sync_filter_widths(self, *args):
+        """Alinea cada caja de filtro con el ancho de su columna en la tabla"""
+        self.filter_bar_layout.setContentsMargins(
+            self.table_view.verticalHeader().width() + self.table_view.frameWidth(), 0, 0, 0
+        )
+        for col, filter_edit in enumerate(self.filter_edits):
+            filter_edit.setFixedWidth(max(self.table_view.columnWidth(col), 20))
 
-        self.table_widget.itemSelectionChanged.connect(self.on_table_selection_changed)
-        self.table_widget.setSortingEnabled(True)
-        
     def clear_filters(self):
         if self.df is None:
             return
         
-        for col_idx in range(self.table_widget.columnCount()):
-            filter_edit = self.table_widget.cellWidget(0, col_idx)
-            if filter_edit:
-                filter_edit.clear()
+        self._filter_timer.stop()
+        for filter_edit in self.filter_edits:
+            filter_edit.clear()
         
-        self.filtered_df = self.df.copy()
+        self.filtered_df = self.df
+        self._is_filtered = False
         self.display_data_table()
         self.plot_data()
 
@@ -1418,12 +2134,13 @@ class CSVPlotterApp(QMainWindow):
 
     def on_table_selection_changed(self):
         try:
-            selected_items = self.table_widget.selectedItems()
-            if not selected_items:
+            selected = self.table_view.selectionModel().selectedIndexes()
+            if not selected:
                 self.clear_highlights()
                 return
 
-            selected_row = selected_items[0].row() - 1
+            # La vista puede estar ordenada: traducir a la posición real en filtered_df
+            selected_row = self.table_model.source_row(selected[0].row())
             
             if selected_row < 0 or selected_row >= len(self.filtered_df):
                 self.clear_highlights()
@@ -1435,7 +2152,7 @@ class CSVPlotterApp(QMainWindow):
                 if hasattr(self.plot_2d, 'highlight_point'):
                     self.plot_2d.highlight_point(selected_row)
                     
-            self.table_widget.scrollToItem(selected_items[0], QTableWidget.ScrollHint.PositionAtCenter)
+            self.table_view.scrollTo(selected[0], QAbstractItemView.ScrollHint.PositionAtCenter)
             
         except Exception as e:
             print(f"Error in table selection: {str(e)}")
@@ -1443,17 +2160,22 @@ class CSVPlotterApp(QMainWindow):
 
     def clear_highlights(self):
         if self.is_3d_view:
-            if hasattr(self.plot_3d, 'highlighted_point') and self.plot_3d.highlighted_point:
-                for item in self.plot_3d.highlighted_point:
-                    self.plot_3d.removeItem(item)
-                self.plot_3d.highlighted_point = None
+            if hasattr(self.plot_3d, 'clear_highlight'):
+                self.plot_3d.clear_highlight()
         else:
-            if hasattr(self.plot_2d, 'highlighted_point') and self.plot_2d.highlighted_point:
-                self.plot_2d.removeItem(self.plot_2d.highlighted_point)
-                self.plot_2d.highlighted_point = None
+            self.clear_highlight_2d()
 
     def plot_data(self):
         """Actualizar la visualización según el modo actual."""
+        self._busy += 1
+        try:
+            self._plot_data()
+        finally:
+            self._busy -= 1
+
+    def _plot_data(self):
+        # Un repintado explícito deja sin efecto el diferido que pudiera estar pendiente
+        self._replot_timer.stop()
         if not self.opengl_available and self.is_3d_view:
             QMessageBox.warning(self, "OpenGL no disponible", 
                 "No se puede mostrar la vista 3D porque OpenGL no está disponible.")
@@ -1464,7 +2186,7 @@ class CSVPlotterApp(QMainWindow):
             if self.is_3d_view:
                 self.plot_3d.clear()
             else:
-                self.plot_2d.clear()
+                self.clear_plot_2d()
             return
 
         try:
@@ -1480,68 +2202,62 @@ class CSVPlotterApp(QMainWindow):
                         return
                     
                     try:
-                        # Crear una copia del DataFrame para trabajar
-                        plot_df = self.filtered_df.copy()
-                        
-                        # Convertir las columnas a numéricas de forma segura
-                        plot_df[self.x_combo.currentText()] = pd.to_numeric(plot_df[self.x_combo.currentText()], errors='coerce')
-                        plot_df[self.y_combo.currentText()] = pd.to_numeric(plot_df[self.y_combo.currentText()], errors='coerce')
-                        plot_df[self.z_combo.currentText()] = pd.to_numeric(plot_df[self.z_combo.currentText()], errors='coerce')
-                        
-                        # Filtrar filas con valores no numéricos
-                        valid_mask = ~(
-                            plot_df[self.x_combo.currentText()].isna() | 
-                            plot_df[self.y_combo.currentText()].isna() | 
-                            plot_df[self.z_combo.currentText()].isna()
-                        )
+                        x_name = self.x_combo.currentText()
+                        y_name = self.y_combo.currentText()
+                        z_name = self.z_combo.currentText()
+                        # Coordenadas float32 cacheadas (NaN donde el valor no es numérico);
+                        # se descartan también los infinitos, que romperían el encuadre
+                        coords = self.plot_coords((x_name, y_name, z_name), np.float32)
+                        valid_mask = np.isfinite(coords).all(axis=1)
                         
                         if not valid_mask.any():
                             print("Error: No hay datos válidos para graficar")
                             return
                         
-                        # Aplicar la máscara a todo el DataFrame
-                        plot_df = plot_df[valid_mask]
-                        
-                        # Limpiar el gráfico 3D
-                        self.plot_3d.clear()
+                        # Limpiar el gráfico 3D conservando las series que se van a reutilizar
+                        reusable = {key: item for key, item in self._scatter_items_3d.items()
+                                    if item in self.plot_3d.items}
+                        self.plot_3d.clear(keep=reusable.values())
                         self.plot_3d.add_infinite_axes(
-                            x_label=self.x_combo.currentText(),
-                            y_label=self.y_combo.currentText(),
-                            z_label=self.z_combo.currentText()
+                            x_label=x_name,
+                            y_label=y_name,
+                            z_label=z_name
                         )
                         
-                        # Si hay columna de emisor, pintar cada uno con su color
-                        if self.emitter_col and self.emitter_col in plot_df.columns:
-                            emitters = plot_df[self.emitter_col].unique()
-                            for emitter in emitters:
-                                mask = plot_df[self.emitter_col] == emitter
-                                color = self.get_emitter_color(emitter, for_3d=True)  # Obtener color en formato RGBA
-                                emitter_data = plot_df[mask]
-                                
+                        # Si hay columna de emisor, pintar cada uno con su color;
+                        # si no, todos del mismo color (blanco)
+                        if self.emitter_col and self.emitter_col in self.filtered_df.columns:
+                            groups = [((emitter, hex_color), idx)
+                                      for emitter, idx, hex_color in self.emitter_indices()]
+                        else:
+                            groups = [((None, '#ffffff'), np.arange(len(coords)))]
+                        
+                        # Con más puntos que el límite se pinta uno de cada `step`, igual en cada emisor
+                        step = self.plot_3d_stride(int(np.count_nonzero(valid_mask)))
+                        self._redraw_3d = self.plot_data
+                        
+                        positions = [_gather_rows(coords, idx, valid_mask, step) for _, idx in groups]
+                        
+                        self._scatter_items_3d = {}
+                        for (key, _), pos in zip(groups, positions):
+                            if not len(pos):
+                                continue
+                            scatter = reusable.pop(key, None)
+                            if scatter is not None:
+                                # Misma serie que en el repintado anterior: solo cambian las posiciones
+                                scatter.setData(pos=pos)
+                            else:
                                 scatter = gl.GLScatterPlotItem(
-                                    pos=np.column_stack((
-                                        emitter_data[self.x_combo.currentText()],
-                                        emitter_data[self.y_combo.currentText()],
-                                        emitter_data[self.z_combo.currentText()]
-                                    )),
-                                    color=color,
+                                    pos=pos,
+                                    color=_palette_rgba(key[1]),  # RGBA precalculado de la paleta
                                     size=5,
                                     pxMode=True
                                 )
                                 self.plot_3d.addItem(scatter)
-                        else:
-                            # Si no hay emisor, todos del mismo color (blanco)
-                            scatter = gl.GLScatterPlotItem(
-                                pos=np.column_stack((
-                                    plot_df[self.x_combo.currentText()],
-                                    plot_df[self.y_combo.currentText()],
-                                    plot_df[self.z_combo.currentText()]
-                                )),
-                                color=(1.0, 1.0, 1.0, 1.0),
-                                size=5,
-                                pxMode=True
-                            )
-                            self.plot_3d.addItem(scatter)
+                            self._scatter_items_3d[key] = scatter
+                        # Emisores que ya no aparecen en los datos
+                        for scatter in reusable.values():
+                            self.plot_3d.removeItem(scatter)
                         
                         self.plot_3d.auto_range()
                         
@@ -1557,41 +2273,36 @@ class CSVPlotterApp(QMainWindow):
                         print("Error: Columnas seleccionadas no encontradas en los datos")
                         return
                         
-                    x_col = pd.to_numeric(self.filtered_df[self.x_combo.currentText()], errors='coerce')
-                    y_col = pd.to_numeric(self.filtered_df[self.y_combo.currentText()], errors='coerce')
+                    # En 2D se mantiene float64: los ejes muestran valores reales sin normalizar
+                    coords = self.plot_coords(
+                        (self.x_combo.currentText(), self.y_combo.currentText()), np.float64
+                    )
                     
                     # Filtrar datos no numéricos
-                    valid_mask = ~(x_col.isna() | y_col.isna())
-                    x_col = x_col[valid_mask]
-                    y_col = y_col[valid_mask]
+                    valid_mask = np.isfinite(coords).all(axis=1)
                     
-                    self.plot_2d.clear()
+                    # Se conservan las series existentes para actualizarlas con setData
+                    reusable = {key: item for key, item in self._scatter_items_2d.items()
+                                if item in self.plot_2d.getPlotItem().items}
+                    self.clear_plot_2d(keep=reusable.values())
                     if self.emitter_col and self.emitter_col in self.filtered_df.columns:
                         # Si hay columna de emisor, pintar cada uno con su color
-                        emitters = self.filtered_df[valid_mask][self.emitter_col].unique()
-                        for emitter in emitters:
-                            mask = self.filtered_df[valid_mask][self.emitter_col] == emitter
-                            color = self.get_emitter_color(emitter)
-                            scatter = pg.ScatterPlotItem(
-                                x=x_col[mask],
-                                y=y_col[mask],
-                                pen=None,
-                                brush=color,
-                                symbol='o',
-                                size=5
-                            )
-                            self.plot_2d.addItem(scatter)
+                        groups = [((emitter, hex_color), idx[valid_mask[idx]])
+                                  for emitter, idx, hex_color in self.emitter_indices()]
                     else:
                         # Si no hay emisor, todos del mismo color
-                        scatter = pg.ScatterPlotItem(
-                            x=x_col,
-                            y=y_col,
-                            pen=None,
-                            brush='w',
-                            symbol='o',
-                            size=5
-                        )
-                        self.plot_2d.addItem(scatter)
+                        groups = [((None, '#ffffff'), np.flatnonzero(valid_mask))]
+                    
+                    self._scatter_items_2d = {}
+                    for key, idx in groups:
+                        if len(idx):
+                            self._scatter_items_2d[key] = self.add_2d_scatter(
+                                coords[idx, 0], coords[idx, 1], self.color_brush(key[1]),
+                                reusable.pop(key, None)
+                            )
+                    # Emisores que ya no aparecen en los datos
+                    for scatter in reusable.values():
+                        self.plot_2d.removeItem(scatter)
                     
                     self.plot_2d.getViewBox().autoRange()
                     
@@ -1599,7 +2310,94 @@ class CSVPlotterApp(QMainWindow):
             print(f"Error al graficar los datos: {e}")
             QMessageBox.warning(self, "Error", f"No se pudo graficar:\n{str(e)}")
         
-    def get_emitter_color(self, emitter):
+    def plot_coords(self, cols, dtype):
+        """Array contiguo con las columnas cols de filtered_df como dtype (NaN si no son numéricas)
+
+        Se cachea por columnas y dtype mientras filtered_df sea el mismo objeto,
+        así que cambiar de vista o repintar no vuelve a convertir las columnas.
+        """
+        if self._coord_cache_df is not self.filtered_df:
+            self._coord_cache = {}
+            self._coord_cache_df = self.filtered_df
+        key = (tuple(cols), np.dtype(dtype).str)
+        coords = self._coord_cache.get(key)
+        if coords is None:
+            # Se rellena columna a columna un único buffer (n, k) ya con el dtype final
+            coords = np.empty((len(self.filtered_df), len(cols)), dtype=dtype)
+            for j, col in enumerate(cols):
+                coords[:, j] = pd.to_numeric(self.filtered_df[col], errors='coerce').to_numpy(
+                    dtype=dtype, na_value=np.nan
+                )
+            self._coord_cache[key] = coords
+        return coords
+
+    def add_2d_scatter(self, x, y, brush, scatter=None):
+        """Añade al gráfico 2D una serie diezmada con M4 según el ancho actual del gráfico
+
+        Si se pasa ``scatter`` se actualizan sus datos en lugar de crear otro item.
+        """
+        if len(x):
+            extremes = np.array([x.argmin(), x.argmax(), y.argmin(), y.argmax()])
+        else:
+            extremes = np.array([], dtype=np.int64)
+        idx = _m4_indices(x, y, max(self.plot_2d.width(), 1))
+        if scatter is not None:
+            scatter.setData(x=x[idx], y=y[idx])
+        else:
+            scatter = pg.ScatterPlotItem(
+                x=x[idx],
+                y=y[idx],
+                pen=None,
+                brush=brush,
+                symbol='o',
+                size=5
+            )
+            # Se cachea en coordenadas de dispositivo: mover el marcador no repinta la nube de puntos
+            scatter.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+            self.plot_2d.addItem(scatter)
+        self._m4_series.append((scatter, x, y, extremes))
+        return scatter
+
+    def refresh_2d_downsampling(self):
+        """Recalcula el diezmado M4 de las series 2D para el rango X visible"""
+        if not self._m4_series:
+            return
+        x_range = self.plot_2d.getViewBox().viewRange()[0]
+        n_pixels = max(self.plot_2d.width(), 1)
+        for scatter, x, y, extremes in self._m4_series:
+            # Los extremos globales se conservan para que autoRange siga viendo todos los datos
+            idx = np.union1d(_m4_indices(x, y, n_pixels, x_range), extremes)
+            scatter.setData(x=x[idx], y=y[idx])
+
+    def color_brush(self, color):
+        """QBrush de un color hex, creado una sola vez y reutilizado entre series y replots"""
+        brush = self._brush_cache.get(color)
+        if brush is None:
+            brush = self._brush_cache[color] = pg.mkBrush(color)
+        return brush
+
+    def pulse_line_pen(self, color):
+        """QPen punteado y semitransparente de las líneas de pulsos 2D, uno por color hex"""
+        pen = self._pulse_pen_cache.get(color)
+        if pen is None:
+            qcolor = QColor(color)
+            qcolor.setAlpha(120)
+            pen = self._pulse_pen_cache[color] = pg.mkPen(qcolor, width=2, style=Qt.PenStyle.DotLine)
+        return pen
+
+    def color_hex_name(self, color):
+        """Nombre #rrggbb normalizado de un color, calculado una sola vez por color"""
+        name = self._color_hex_cache.get(color)
+        if name is None:
+            name = self._color_hex_cache[color] = pg.mkColor(color).name()
+        return name
+
+    def get_emitter_color(self, emitter, for_3d=False):
+        color = self._emitter_hex_color(emitter)
+        # Para OpenGL se devuelve el RGBA pre-convertido de la paleta
+        return _palette_rgba(color) if for_3d else color
+
+    def _emitter_hex_color(self, emitter):
         # Manejar valores vacíos o None
         if emitter is None or (isinstance(emitter, str) and emitter.strip() == ""):
             return NOISE_COLOR
@@ -1619,76 +2417,130 @@ class CSVPlotterApp(QMainWindow):
         return self.emitter_color_map[emitter]
     
     def apply_filters(self):
+        self._busy += 1
+        try:
+            self._apply_filters()
+        finally:
+            self._busy -= 1
+
+    def _apply_filters(self):
+        # Un filtrado explícito deja sin efecto el diferido que pudiera estar pendiente
+        self._filter_timer.stop()
         if self.df is None:
             return
             
-        mask = pd.Series([True] * len(self.df), index=self.df.index)
+        mask = np.ones(len(self.df), dtype=bool)
         
-        for col_idx in range(self.table_widget.columnCount()):
-            col_name = self.table_widget.horizontalHeaderItem(col_idx).text()
-            filter_edit = self.table_widget.cellWidget(0, col_idx)
+        for col_name, filter_edit in zip(self.filter_columns, self.filter_edits):
             filter_text = filter_edit.text().strip()
             
             if filter_text and col_name in self.df.columns:
                 try:
-                    numeric_series = pd.to_numeric(self.df[col_name], errors='coerce')
-                    col_mask = self.process_filter_expression(numeric_series, filter_text)
-                    mask = mask & col_mask
+                    column = self.df[col_name]
+                    if column.dtype == 'category':
+                        # Evaluar la expresión sobre las categorías y seleccionar por código entero
+                        selected_codes = np.flatnonzero(
+                            self.process_filter_expression(self.filter_values(col_name), filter_text)
+                        )
+                        mask &= np.isin(column.cat.codes.to_numpy(), selected_codes)
+                    else:
+                        # El kernel combina en la propia máscara y salta las filas ya descartadas
+                        self.process_filter_expression(self.filter_values(col_name), filter_text, mask)
                 except Exception as e:
                     self.statusBar().showMessage(f"Error en filtro {col_name}: {str(e)}", 3000)
                     return
         
-        self.filtered_df = self.df[mask].copy()
+        # Mismo df, misma máscara y filtered_df intacto desde el último filtrado: nada que repintar
+        last_df, last_filtered_df, last_mask = self._last_filter
+        if (last_df is self.df and last_filtered_df is self.filtered_df
+                and np.array_equal(last_mask, mask)):
+            return
+        
+        # Solo se materializa un DataFrame nuevo si el filtro descarta alguna fila
+        self._is_filtered = not np.all(mask)
+        self.filtered_df = self.df.iloc[mask] if self._is_filtered else self.df
+        self._last_filter = (self.df, self.filtered_df, mask)
         self.display_data_table()
         self.plot_data()
         # --- NUEVO: Actualizar leyenda si está visible ---
         if self.legend_window and self.legend_window.isVisible():
             self.update_legend(self.filtered_df)
 
-    def process_filter_expression(self, series, expression):
+    def filter_values(self, col_name):
+        """Valores float64 de una columna de self.df para filtrar (de las categorías si es categórica)
+
+        La conversión se hace una vez por columna y se reutiliza mientras self.df
+        sea el mismo objeto.
+        """
+        if self._numeric_cache_df is not self.df:
+            self._numeric_cache = {}
+            self._numeric_cache_df = self.df
+        values = self._numeric_cache.get(col_name)
+        if values is None:
+            column = self.df[col_name]
+            if column.dtype == 'category':
+                column = pd.Series(column.cat.categories)
+            values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            self._numeric_cache[col_name] = values
+        return values
+
+    def parse_filter_expression(self, expression):
+        """Traduce una expresión de filtro a arrays (operadores, umbrales) para _filter_mask
+
+        Cada texto se analiza una sola vez; los errores no se guardan y se repiten.
+        """
+        parsed = self._filter_parse_cache.get(expression)
+        if parsed is None:
+            parsed = self._filter_parse_cache[expression] = self._parse_filter_expression(expression)
+        return parsed
+
+    def _parse_filter_expression(self, expression):
+        conditions = []
         if ':' in expression:
             try:
                 min_val, max_val = expression.split(':')
                 min_val = float(min_val) if min_val else -np.inf
                 max_val = float(max_val) if max_val else np.inf
-                return (series >= min_val) & (series <= max_val)
             except ValueError:
                 raise ValueError("Formato de intervalo inválido. Use 'min:max'.")
-
-        parts = expression.split()
-        if len(parts) == 1:
-            part = parts[0]
-            if part.startswith(('>', '<', '=')):
+            conditions = [(FILTER_GE, min_val), (FILTER_LE, max_val)]
+        else:
+            parts = expression.split()
+            if len(parts) == 1:
+                part = parts[0]
                 if part.startswith('>'):
-                    value = float(part[1:])
-                    return series > value
+                    conditions = [(FILTER_GT, float(part[1:]))]
                 elif part.startswith('<'):
-                    value = float(part[1:])
-                    return series < value
+                    conditions = [(FILTER_LT, float(part[1:]))]
                 elif part.startswith('='):
-                    value = float(part[1:])
-                    return series == value
-            else:
-                value = float(part)
-                return series == value
-        else:
-            mask = pd.Series([True] * len(series), index=series.index)
-            i = 0
-            while i < len(parts):
-                part = parts[i]
-                if part in ['>', '<']:
-                    if i + 1 >= len(parts):
-                        raise ValueError("Expresión incompleta")
-                    
-                    value = float(parts[i+1])
-                    if part == '>':
-                        mask = mask & (series > value)
-                    elif part == '<':
-                        mask = mask & (series < value)
-                    i += 2
+                    conditions = [(FILTER_EQ, float(part[1:]))]
                 else:
-                    raise ValueError(f"Operador no reconocido: {part}")
-            return mask
+                    conditions = [(FILTER_EQ, float(part))]
+            else:
+                i = 0
+                while i < len(parts):
+                    part = parts[i]
+                    if part in ['>', '<']:
+                        if i + 1 >= len(parts):
+                            raise ValueError("Expresión incompleta")
+                        conditions.append((FILTER_GT if part == '>' else FILTER_LT, float(parts[i+1])))
+                        i += 2
+                    else:
+                        raise ValueError(f"Operador no reconocido: {part}")
+        ops = np.array([op for op, _ in conditions], dtype=np.int8)
+        thresholds = np.array([value for _, value in conditions], dtype=np.float64)
+        return ops, thresholds
+
+    def process_filter_expression(self, values, expression, mask=None):
+        """Máscara booleana de los elementos del array float64 values que cumplen la expresión
+
+        Si se da mask, el resultado se combina con AND sobre ella en el sitio.
+        """
+        ops, thresholds = self.parse_filter_expression(expression)
+        if mask is None:
+            mask = np.ones(len(values), dtype=bool)
+        _filter_mask(values, ops, thresholds, mask)
+        return mask
 
     def save_image(self):
         if not self.is_3d_view and not hasattr(self.plot_2d, 'plotItem'):
@@ -1704,7 +2556,22 @@ class CSVPlotterApp(QMainWindow):
         if file_path:
             try:
                 if self.is_3d_view:
+                    # La imagen guardada incluye todos los puntos aunque la vista esté submuestreada
+                    subsampled = self._plot_3d_stride > 1
+                    camera = self.plot_3d.cameraParams()
+                    if subsampled:
+                        # Se repite el mismo camino de pintado que dibujó la vista actual
+                        redraw = self._redraw_3d
+                        self._full_resolution = True
+                        try:
+                            redraw()
+                        finally:
+                            self._full_resolution = False
+                        self.plot_3d.setCameraParams(**camera)
                     img = self.plot_3d.grabFramebuffer()
+                    if subsampled:
+                        redraw()
+                        self.plot_3d.setCameraParams(**camera)
                     img.save(file_path)
                 else:
                     exporter = pg.exporters.ImageExporter(self.plot_2d.plotItem)
@@ -1738,16 +2605,14 @@ class CSVPlotterApp(QMainWindow):
             ref_file = os.path.join(script_dir, 'reference_emitters.txt')
             
             if os.path.exists(ref_file):
+                # Una sola lectura del archivo y una pasada por sus líneas "nombre=código"
                 with open(ref_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and '=' in line:
-                            name, code = line.rsplit('=', 1)
-                            try:
-                                code = int(code)
-                                emitter_ref[code] = name.strip()
-                            except ValueError:
-                                print(f"Error parsing emitter code in line: {line}")
+                    text = f.read()
+                for name, _, code in (line.strip().rpartition('=') for line in text.splitlines() if '=' in line):
+                    try:
+                        emitter_ref[int(code.strip())] = name.strip()
+                    except ValueError:
+                        print(f"Error parsing emitter code in line: {name}={code}")
         except Exception as e:
             print(f"Error loading reference_emitters.txt: {e}")
         
@@ -1824,7 +2689,8 @@ class CSVPlotterApp(QMainWindow):
         # 3D
         if hasattr(self, "plot_3d") and hasattr(self.plot_3d, "items"):
             for line in getattr(self, "_pulse_lines", []):
-                if hasattr(self.plot_3d, "removeItem"):
+                # GLViewWidget.removeItem falla con items que no son suyos (las líneas 2D)
+                if hasattr(self.plot_3d, "removeItem") and line in self.plot_3d.items:
                     self.plot_3d.removeItem(line)
         self._pulse_lines = []
 
@@ -1844,6 +2710,9 @@ class CSVPlotterApp(QMainWindow):
             QMessageBox.warning(self, "Sin columna TOA", "No se encontró columna TOA para ordenar los pulsos.")
             return
 
+        # TOAs de todas las filas una sola vez; cada emisor solo ordena sus índices
+        toas = pd.to_numeric(df[toa_col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
         # Determinar modo (2D o 3D)
         if self.is_3d_view:
             x_col = self.x_combo.currentText()
@@ -1851,61 +2720,33 @@ class CSVPlotterApp(QMainWindow):
             z_col = self.z_combo.currentText()
             if not (x_col and y_col and z_col):
                 return
-            for emitter in df[emitter_col].unique():
-                group = df[df[emitter_col] == emitter].copy()
-                group = group.sort_values(by=toa_col)
-                x = pd.to_numeric(group[x_col], errors='coerce').values
-                y = pd.to_numeric(group[y_col], errors='coerce').values
-                z = pd.to_numeric(group[z_col], errors='coerce').values
-                toas = pd.to_numeric(group[toa_col], errors='coerce').values
-                               # Conectar solo si la diferencia entre TOAs es menor o igual a max_dist_ns
-                seg_points = []
-                for i in range(1, len(toas)):
-                    if np.isnan(toas[i-1]) or np.isnan(toas[i]):
-
-                        continue
-                    if abs(toas[i] - toas[i-1]) <= max_dist_ns:
-                        seg_points.append([[x[i-1], y[i-1], z[i-1]], [x[i], y[i], z[i]]])
-                # Dibujar cada segmento
-                color = self.get_emitter_color(emitter)
-                if isinstance(color, str):
-                    qcolor = QColor(color)
-                   
-                    rgba = (qcolor.redF(), qcolor.greenF(), qcolor.blueF(), 0.35)
-                else:
-                    rgba = tuple(list(color[:3]) + [0.35])
-                for seg in seg_points:
-                    arr = np.array(seg)
-                    line = gl.GLLinePlotItem(pos=arr, color=rgba, width=2, antialias=True, mode='lines')
-                    self.plot_3d.addItem(line)
-                    self._pulse_lines.append(line)
+            coords = self.plot_coords((x_col, y_col, z_col), np.float32)
+            for emitter, idx, color in self.emitter_indices():
+                idx = idx[np.argsort(toas[idx], kind='stable')]
+                # Conectar solo si la diferencia entre TOAs es menor o igual a max_dist_ns
+                pos = _pulse_segments(toas[idx], coords[idx], max_dist_ns)
+                if not len(pos):
+                    continue
+                rgba = (*_palette_rgba(color)[:3], 0.35)  # RGBA precalculado de la paleta
+                # Todos los segmentos del emisor en un único item (mode='lines' une los puntos por pares)
+                line = gl.GLLinePlotItem(pos=pos, color=rgba, width=2, antialias=True, mode='lines')
+                self.plot_3d.addItem(line)
+                self._pulse_lines.append(line)
         else:
             x_col = self.x_combo.currentText()
             y_col = self.y_combo.currentText()
             if not (x_col and y_col):
                 return
-            for emitter in df[emitter_col].unique():
-                group = df[df[emitter_col] == emitter].copy()
-                group = group.sort_values(by=toa_col)
-                x = pd.to_numeric(group[x_col], errors='coerce').values
-                y = pd.to_numeric(group[y_col], errors='coerce').values
-                toas = pd.to_numeric(group[toa_col], errors='coerce').values
-                color = self.get_emitter_color(emitter)
-                if isinstance(color, str):
-                    qcolor = QColor(color)
-                    pen = pg.mkPen(qcolor.lighter(170), width=2, style=Qt.PenStyle.DotLine)
-                    pen.setColor(QColor(qcolor.red(), qcolor.green(), qcolor.blue(), 120))
-                else:
-                    r, g, b = [int(255*c) for c in color[:3]]
-                    pen = pg.mkPen(QColor(r, g, b, 120), width=2, style=Qt.PenStyle.DotLine)
+            coords = self.plot_coords((x_col, y_col), np.float64)
+            for emitter, idx, color in self.emitter_indices():
+                idx = idx[np.argsort(toas[idx], kind='stable')]
                 # Dibujar solo segmentos cuya diferencia de TOA sea menor o igual a max_dist_ns
-                for i in range(1, len(toas)):
-                    if np.isnan(toas[i-1]) or np.isnan(toas[i]):
-                        continue
-                    if abs(toas[i] - toas[i-1]) <= max_dist_ns:
-                        line = pg.PlotCurveItem([x[i-1], x[i]], [y[i-1], y[i]], pen=pen)
-                        self.plot_2d.addItem(line)
-                        self._pulse_lines.append(line)
+                pos = _pulse_segments(toas[idx], coords[idx], max_dist_ns)
+                if not len(pos):
+                    continue
+                line = pg.PlotCurveItem(pos[:, 0], pos[:, 1], pen=self.pulse_line_pen(color), connect='pairs')
+                self.plot_2d.addItem(line)
+                self._pulse_lines.append(line)
 
     def show_histogram_window(self):
         if self.filtered_df is None or self.filtered_df.empty: